@@ -1,18 +1,43 @@
 #!/usr/bin/env python3
 """Main entry point for Arrakis MVP Backend."""
 
+import os
+import sys
 import uvicorn
-from .main import app
 
-def main():
-    """Run the FastAPI application."""
+
+def _run(reload: bool, workers: int):
+    """Run the FastAPI application under uvicorn."""
     uvicorn.run(
-        app,
+        # Import string (not the app object) so worker processes can load it
+        "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        workers=workers,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        reload=reload,
         log_level="info"
     )
 
+
+def main():
+    """Run the application for production: one worker per CPU, no reloader."""
+    workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    # Workers inherit the environment, so each one knows how many share the
+    # instance-wide limits (settings.web_concurrency)
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    _run(reload=False, workers=workers)
+
+
+def dev():
+    """Run the application for development: a single worker that reloads on changes."""
+    # The reloader only supports a single worker
+    _run(reload=True, workers=1)
+
+
 if __name__ == "__main__":
-    main()
+    if os.getenv("DEV") == "1":
+        dev()
+    else:
+        main()
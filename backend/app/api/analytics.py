@@ -1,19 +1,67 @@
 """Analytics API endpoints for Arrakis MVP."""
 
 import logging
+import re
 import uuid
-from fastapi import APIRouter, HTTPException
+from bisect import bisect_right
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import Dict, Any, List
-from ..services.perplexity_client import PerplexityClient
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+from ..services.perplexity_client import PerplexityClient, get_perplexity_client
 from ..supabase.client import db
 from ..core.config import settings
+from ..core.rate_limit import RateLimitedRoute
+from .dashboard import invalidate_dashboard_cache
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+router = APIRouter(prefix="/api/analytics", tags=["analytics"], route_class=RateLimitedRoute)
 
-# Initialize Perplexity client only
-perplexity_client = PerplexityClient()
+# Common patterns for brand mentions, compiled once at import. Each pattern is
+# paired with a literal it cannot match without, so the regex only runs on
+# prompts that contain that literal.
+_BRAND_PATTERNS = tuple((literal, re.compile(p)) for literal, p in [
+    ("analyze ", r"analyze (?:the\s+)?([A-Za-z\s]+?)(?:\s+is\s+doing|\s+performing|\s+visibility|\s+brand|\s+company|\.|,|$|\?)"),
+    (" brand", r"([A-Za-z\s]+?) brand"),
+    (" company", r"([A-Za-z\s]+?) company"),
+    (" visibility", r"([A-Za-z\s]+?) visibility"),
+    (" market presence", r"([A-Za-z\s]+?) market presence"),
+    ("how is ", r"how is ([A-Za-z\s]+?) doing"),
+    ("what about ", r"what about ([A-Za-z\s]+?)"),
+    (" performance", r"([A-Za-z\s]+?) performance"),
+    ("analyze ", r"analyze ([A-Za-z\s]+?) in"),
+    (" market position", r"([A-Za-z\s]+?) market position")
+])
+
+_DOMAIN_RE = re.compile(r'https?://(?:www\.)?([^/]+)')
+
+# Keywords used to classify crawled content that has no sentiment label
+_POSITIVE_WORDS = ('good', 'great', 'excellent', 'positive', 'successful', 'leading', 'innovative', 'strong')
+_NEGATIVE_WORDS = ('bad', 'poor', 'negative', 'failing', 'weak', 'declining', 'struggling', 'problem')
+
+# Source-count bands: a count at or above thresholds[i] (and below the next one)
+# gets labels[i + 1]
+_COVERAGE_THRESHOLDS = (8, 15, 25, 35, 45)
+_COVERAGE_LABELS = (
+    "Minimal (<8 sites)",
+    "Limited (8-14 sites)",
+    "Moderate (15-24 sites)",
+    "Good (25-34 sites)",
+    "Extensive (35-44 sites)",
+    "Comprehensive (45+ sites)"
+)
+_QUALITY_THRESHOLDS = (10, 20, 30, 40)
+_QUALITY_LABELS = ("poor", "fair", "good", "very good", "excellent")
+
+
+class SentimentStats(NamedTuple):
+    """Sentiment tallies over a set of crawled documents."""
+    positive_count: int
+    negative_count: int
+    neutral_count: int
+    sources: Tuple[str, ...]
+    unique_sources: frozenset
+    overall_tone: str
 
 
 class AnalyzeRequest(BaseModel):
@@ -28,11 +76,16 @@ class AnalysisResponse(BaseModel):
     analysis_id: str
 
 
-@router.post("/analyze", response_model=AnalysisResponse)
-async def analyze_prompt(request: AnalyzeRequest):
+# The model documents the response; the endpoint returns ORJSONResponse directly
+# so the trusted internal dict is not validated and re-serialized field by field
+@router.post("/analyze", response_class=ORJSONResponse, responses={200: {"model": AnalysisResponse}})
+async def analyze_prompt(
+    request: AnalyzeRequest,
+    perplexity_client: PerplexityClient = Depends(get_perplexity_client)
+):
     """Analyze a prompt using Perplexity AI and store results in database."""
     try:
-        logger.info(f"Starting analysis for prompt: {request.prompt}")
+        logger.info("Starting analysis for prompt: %s", request.prompt)
         
         # Extract brand name from prompt
         brand_name = _extract_brand_name(request.prompt)
@@ -46,28 +99,32 @@ async def analyze_prompt(request: AnalyzeRequest):
             target_websites=settings.pplx_target_sites  # Use config value (25)
         )
         
+        # Classify the crawled content once and share it with both consumers
+        stats = _compute_sentiment_counts(perplexity_result.get('crawled_content', []))
+        
         # Store results in database
-        await _store_analysis_results(analysis_id, brand_name, request.prompt, perplexity_result)
+        await _store_analysis_results(analysis_id, brand_name, request.prompt, perplexity_result, stats)
         
         # Extract the four parameters from Perplexity results
-        analysis_result = _extract_four_parameters(perplexity_result, brand_name)
+        analysis_result = _extract_four_parameters(perplexity_result, brand_name, stats)
         
-        logger.info(f"Analysis completed successfully for brand: {brand_name}")
+        logger.info("Analysis completed successfully for brand: %s", brand_name)
         
-        return AnalysisResponse(
-            sentiment=analysis_result["sentiment"],
-            brand_mentions=analysis_result["brand_mentions"],
-            website_coverage=analysis_result["website_coverage"],
-            trust_score=analysis_result["trust_score"],
-            analysis_id=analysis_id
-        )
+        analysis_result["analysis_id"] = analysis_id
+        return ORJSONResponse(content=analysis_result)
         
     except Exception as e:
-        logger.error(f"Analysis failed: {e}")
+        logger.error("Analysis failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
-async def _store_analysis_results(analysis_id: str, brand_name: str, prompt: str, perplexity_result: Dict[str, Any]):
+async def _store_analysis_results(
+    analysis_id: str,
+    brand_name: str,
+    prompt: str,
+    perplexity_result: Dict[str, Any],
+    stats: Optional[SentimentStats] = None
+):
     """Store analysis results in the database."""
     try:
         # Calculate basic metrics from Perplexity results
@@ -75,47 +132,13 @@ async def _store_analysis_results(analysis_id: str, brand_name: str, prompt: str
         crawled_content = perplexity_result.get('crawled_content', [])
         
         # Calculate sentiment using the same logic as the frontend response
-        positive_count = 0
-        negative_count = 0
-        neutral_count = 0
-        
-        for content in crawled_content:
-            # Check if Perplexity provided sentiment analysis
-            if 'sentiment' in content:
-                sentiment = content['sentiment'].lower()
-                if 'positive' in sentiment or 'good' in sentiment or 'excellent' in sentiment:
-                    positive_count += 1
-                elif 'negative' in sentiment or 'bad' in sentiment or 'poor' in sentiment:
-                    negative_count += 1
-                else:
-                    neutral_count += 1
-            else:
-                # If no sentiment data, analyze content text for keywords
-                content_text = content.get('content', '').lower()
-                positive_words = ['good', 'great', 'excellent', 'positive', 'successful', 'leading', 'innovative', 'strong']
-                negative_words = ['bad', 'poor', 'negative', 'failing', 'weak', 'declining', 'struggling', 'problem']
-                
-                positive_matches = sum(1 for word in positive_words if word in content_text)
-                negative_matches = sum(1 for word in negative_words if word in content_text)
-                
-                if positive_matches > negative_matches:
-                    positive_count += 1
-                elif negative_matches > positive_matches:
-                    negative_count += 1
-                else:
-                    neutral_count += 1
+        if stats is None:
+            stats = _compute_sentiment_counts(crawled_content)
+        positive_count, negative_count, neutral_count, sources, _, overall_tone = stats
         
         # Calculate meaningful metrics (no confusing percentages)
         total = max(total_sources, 1)
         
-        # Determine overall sentiment tone
-        if positive_count > negative_count and positive_count > neutral_count:
-            overall_tone = 'positive'
-        elif negative_count > positive_count and negative_count > neutral_count:
-            overall_tone = 'negative'
-        else:
-            overall_tone = 'neutral'
-        
         # Calculate meaningful trust score
         trust_score = min(100, max(0, (total_sources * 1.5) + (positive_count * 2)))
         
@@ -137,30 +160,99 @@ async def _store_analysis_results(analysis_id: str, brand_name: str, prompt: str
             "total_tokens_used": perplexity_result.get('total_tokens_used', 0),
             "analysis_summary": perplexity_result.get('content', ''),
             "detailed_analyses": crawled_content,
-            "crawled_urls": [content.get('source', '') for content in crawled_content]
+            "crawled_urls": list(sources)
         }
         
-        # Insert into database
+        # One row per crawled URL, written in a single bulk request
+        url_rows = [
+            {
+                "deep_research_analysis_id": analysis_id,
+                "url": content['url'],
+                "title": content.get('title'),
+                "query_text": prompt,
+                "query_index": index
+            }
+            for index, content in enumerate(crawled_content)
+            if content.get('url')
+        ]
+        
+        # Insert into database (parent first so the child foreign keys resolve)
         await db.insert("deep_research_analysis", analysis_data)
+        try:
+            await db.insert("url_analysis_results", url_rows)
+        except Exception:
+            # The inserts are separate PostgREST requests, so remove the parent
+            # rather than leave an analysis without its URL rows
+            await db.delete("deep_research_analysis", id=analysis_id)
+            raise
+        
+        # dashboard_stats_mv is refreshed on a schedule by pg_cron; the cached
+        # queries over the base table pick up the new rows straight away
+        invalidate_dashboard_cache()
         
-        logger.info(f"Analysis results stored in database with ID: {analysis_id}")
+        logger.info("Analysis results stored in database with ID: %s", analysis_id)
         
     except Exception as e:
-        logger.error(f"Failed to store analysis results: {e}")
+        logger.error("Failed to store analysis results: %s", e)
         raise
 
 
-def _extract_four_parameters(perplexity_result: Dict[str, Any], brand_name: str) -> Dict[str, Any]:
+def _extract_four_parameters(
+    perplexity_result: Dict[str, Any],
+    brand_name: str,
+    stats: Optional[SentimentStats] = None
+) -> Dict[str, Any]:
     """Extract the four key parameters from Perplexity results with meaningful metrics."""
     total_sources = perplexity_result.get('total_sources_analyzed', 0)
     crawled_content = perplexity_result.get('crawled_content', [])
     
     # Calculate sentiment from actual Perplexity content analysis
+    if stats is None:
+        stats = _compute_sentiment_counts(crawled_content)
+    positive_count, negative_count, neutral_count, _, unique_sources, overall_tone = stats
+    n_unique = len(unique_sources)
+    
+    total = max(total_sources, 1)
+    
+    # Calculate meaningful sentiment metrics (no percentages)
+    sentiment_score = (positive_count / total) if total > 0 else 0.5
+    
+    return {
+        "sentiment": {
+            "tone": overall_tone,
+            "score": sentiment_score,  # 0-1 scale, no percentage
+            "summary": f"Analysis of {total_sources} sources: {positive_count} positive, {neutral_count} neutral, {negative_count} negative mentions"
+        },
+        "brand_mentions": {
+            "count": total_sources,
+            "contexts": _extract_mention_contexts(crawled_content),
+            "summary": f"Found {total_sources} sources mentioning {brand_name} across web search results"
+        },
+        "website_coverage": {
+            "total_websites_crawled": total_sources,
+            "unique_websites_found": n_unique,
+            "coverage_percentage": _calculate_meaningful_coverage(total_sources),  # New meaningful metric
+            "coverage_quality": _determine_coverage_quality(total_sources),
+            "summary": f"Analyzed {total_sources} websites with {n_unique} unique domains"
+        },
+        "trust_score": {
+            "ai_recommendations": _calculate_trust_score(total_sources, positive_count, total),
+            "vs_others": _calculate_authority_score(total_sources, n_unique),
+            "summary": f"AI analysis indicates {brand_name} has {'strong' if positive_count > total/2 else 'moderate' if positive_count > total/4 else 'limited'} market presence based on {total_sources} analyzed sources"
+        }
+    }
+
+
+def _compute_sentiment_counts(crawled_content: List[Dict]) -> SentimentStats:
+    """Classify each crawled document as positive, negative or neutral and collect its source."""
     positive_count = 0
     negative_count = 0
     neutral_count = 0
+    sources = []
     
     for content in crawled_content:
+        sources.append(content.get('source', ''))
+        
         # Check if Perplexity provided sentiment analysis
         if 'sentiment' in content:
             sentiment = content['sentiment'].lower()
@@ -172,12 +264,7 @@ def _extract_four_parameters(perplexity_result: Dict[str, Any], brand_name: str)
                 neutral_count += 1
         else:
             # If no sentiment data, analyze content text for keywords
-            content_text = content.get('content', '').lower()
-            positive_words = ['good', 'great', 'excellent', 'positive', 'successful', 'leading', 'innovative', 'strong']
-            negative_words = ['bad', 'poor', 'negative', 'failing', 'weak', 'declining', 'struggling', 'problem']
-            
-            positive_matches = sum(1 for word in positive_words if word in content_text)
-            negative_matches = sum(1 for word in negative_words if word in content_text)
+            positive_matches, negative_matches = _count_sentiment_keywords(content.get('content', ''))
             
             if positive_matches > negative_matches:
                 positive_count += 1
@@ -186,11 +273,6 @@ def _extract_four_parameters(perplexity_result: Dict[str, Any], brand_name: str)
             else:
                 neutral_count += 1
     
-    total = max(total_sources, 1)
-    
-    # Calculate meaningful sentiment metrics (no percentages)
-    sentiment_score = (positive_count / total) if total > 0 else 0.5
-    
     # Determine overall sentiment tone
     if positive_count > negative_count and positive_count > neutral_count:
         overall_tone = 'positive'
@@ -199,30 +281,17 @@ def _extract_four_parameters(perplexity_result: Dict[str, Any], brand_name: str)
     else:
         overall_tone = 'neutral'
     
-    return {
-        "sentiment": {
-            "tone": overall_tone,
-            "score": sentiment_score,  # 0-1 scale, no percentage
-            "summary": f"Analysis of {total_sources} sources: {positive_count} positive, {neutral_count} neutral, {negative_count} negative mentions"
-        },
-        "brand_mentions": {
-            "count": total_sources,
-            "contexts": _extract_mention_contexts(crawled_content),
-            "summary": f"Found {total_sources} sources mentioning {brand_name} across web search results"
-        },
-        "website_coverage": {
-            "total_websites_crawled": total_sources,
-            "unique_websites_found": len(set(content.get('source', '') for content in crawled_content)),
-            "coverage_percentage": _calculate_meaningful_coverage(total_sources),  # New meaningful metric
-            "coverage_quality": _determine_coverage_quality(total_sources),
-            "summary": f"Analyzed {total_sources} websites with {len(set(content.get('source', '') for content in crawled_content))} unique domains"
-        },
-        "trust_score": {
-            "ai_recommendations": _calculate_trust_score(total_sources, positive_count, total),
-            "vs_others": _calculate_authority_score(total_sources, len(set(content.get('source', '') for content in crawled_content))),
-            "summary": f"AI analysis indicates {brand_name} has {'strong' if positive_count > total/2 else 'moderate' if positive_count > total/4 else 'limited'} market presence based on {total_sources} analyzed sources"
-        }
-    }
+    return SentimentStats(
+        positive_count, negative_count, neutral_count, tuple(sources), frozenset(sources), overall_tone
+    )
+
+
+def _count_sentiment_keywords(text: str) -> Tuple[int, int]:
+    """Count how many positive and negative keywords occur in the text."""
+    content_text = text.lower()
+    positive_matches = sum(1 for word in _POSITIVE_WORDS if word in content_text)
+    negative_matches = sum(1 for word in _NEGATIVE_WORDS if word in content_text)
+    return positive_matches, negative_matches
 
 
 def _extract_mention_contexts(crawled_content: List[Dict]) -> List[str]:
@@ -237,8 +306,7 @@ def _extract_mention_contexts(crawled_content: List[Dict]) -> List[str]:
         source = content.get('source', '')
         if source:
             # Extract domain as context
-            import re
-            domain_match = re.search(r'https?://(?:www\.)?([^/]+)', source)
+            domain_match = _DOMAIN_RE.search(source)
             if domain_match:
                 domain = domain_match.group(1)
                 if domain not in contexts:
@@ -253,32 +321,12 @@ def _extract_mention_contexts(crawled_content: List[Dict]) -> List[str]:
 
 def _calculate_meaningful_coverage(total_sources: int) -> str:
     """Calculate meaningful coverage metric instead of confusing percentages."""
-    if total_sources >= 45:
-        return "Comprehensive (45+ sites)"
-    elif total_sources >= 35:
-        return "Extensive (35-44 sites)"
-    elif total_sources >= 25:
-        return "Good (25-34 sites)"
-    elif total_sources >= 15:
-        return "Moderate (15-24 sites)"
-    elif total_sources >= 8:
-        return "Limited (8-14 sites)"
-    else:
-        return "Minimal (<8 sites)"
+    return _COVERAGE_LABELS[bisect_right(_COVERAGE_THRESHOLDS, total_sources)]
 
 
 def _determine_coverage_quality(total_sources: int) -> str:
     """Determine coverage quality based on number of sources."""
-    if total_sources >= 40:
-        return "excellent"
-    elif total_sources >= 30:
-        return "very good"
-    elif total_sources >= 20:
-        return "good"
-    elif total_sources >= 10:
-        return "fair"
-    else:
-        return "poor"
+    return _QUALITY_LABELS[bisect_right(_QUALITY_THRESHOLDS, total_sources)]
 
 
 def _calculate_trust_score(total_sources: int, positive_count: int, total: int) -> float:
@@ -307,29 +355,16 @@ def _extract_brand_name(prompt: str) -> str:
     """Extract brand name from prompt text."""
     prompt_lower = prompt.lower()
     
-    # Common patterns for brand mentions
-    patterns = [
-        r"analyze (?:the\s+)?([A-Za-z\s]+?)(?:\s+is\s+doing|\s+performing|\s+visibility|\s+brand|\s+company|\.|,|$|\?)",
-        r"([A-Za-z\s]+?) brand",
-        r"([A-Za-z\s]+?) company",
-        r"([A-Za-z\s]+?) visibility",
-        r"([A-Za-z\s]+?) market presence",
-        r"how is ([A-Za-z\s]+?) doing",
-        r"what about ([A-Za-z\s]+?)",
-        r"([A-Za-z\s]+?) performance",
-        r"analyze ([A-Za-z\s]+?) in",
-        r"([A-Za-z\s]+?) market position"
-    ]
-    
-    for pattern in patterns:
-        import re
-        match = re.search(pattern, prompt_lower)
+    for literal, pattern in _BRAND_PATTERNS:
+        if literal not in prompt_lower:
+            continue
+        match = pattern.search(prompt_lower)
         if match:
             brand_name = match.group(1).strip()
             # Convert to proper case
             brand_name = ' '.join(word.capitalize() for word in brand_name.split())
             if len(brand_name) > 2:  # Avoid single letters
-                logger.info(f"Extracted brand name: {brand_name}")
+                logger.info("Extracted brand name: %s", brand_name)
                 return brand_name
     
     # If no pattern matches, try to find capitalized words that look like brand names
@@ -346,10 +381,10 @@ def _extract_brand_name(prompt: str) -> str:
                     break
             
             brand_name = ' '.join(brand_parts)
-            logger.info(f"Extracted brand name from capitalized words: {brand_name}")
+            logger.info("Extracted brand name from capitalized words: %s", brand_name)
             return brand_name
     
     # Fallback: use first few words of prompt
     fallback_name = ' '.join(words[:3])[:30]
-    logger.info(f"Using fallback brand name: {fallback_name}")
+    logger.info("Using fallback brand name: %s", fallback_name)
     return fallback_name
@@ -1,34 +1,54 @@
 """Dashboard API endpoints for deep research analysis data."""
 
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, List, Any
+import asyncio
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from typing import Dict, List, Any, Optional, Tuple
 from ..supabase.client import db
+from ..core.cache import async_ttl_cache
 from ..core.config import settings
+from ..core.rate_limit import RateLimitedRoute
 import logging
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
+router = APIRouter(prefix="/api/dashboard", tags=["dashboard"], route_class=RateLimitedRoute)
 
-@router.get("/")
-async def get_dashboard_data() -> Dict[str, Any]:
+# Aggregates only change when a new analysis is stored, so cache them briefly
+_dashboard_cache = async_ttl_cache(maxsize=128, ttl=settings.dashboard_cache_ttl)
+
+async def _with_fallback(query, fallback: Any, description: str) -> Any:
+    """Await a cached query, returning the fallback if it fails so the error is not cached."""
+    try:
+        return await query
+    except Exception as e:
+        logger.error("Error getting %s: %s", description, e)
+        return fallback
+
+@router.get("/", response_class=ORJSONResponse)
+async def get_dashboard_data() -> ORJSONResponse:
     """Get comprehensive dashboard data from deep research analysis."""
     try:
         logger.info("Fetching dashboard data from deep research analysis")
         
-        # Get total analyses count
-        total_analyses = await _get_total_analyses()
-        
-        # Get recent analyses
-        recent_analyses = await _get_recent_analyses(limit=10)
-        
-        # Get sentiment breakdown
-        sentiment_breakdown = await _get_sentiment_breakdown()
-        
-        # Get top performing brands
-        top_brands = await _get_top_brands(limit=10)
-        
-        # Get recent insights
-        recent_insights = await _get_recent_insights(limit=5)
+        # Run the independent aggregate queries concurrently
+        (
+            total_analyses,
+            recent_analyses,
+            sentiment_breakdown,
+            top_brands,
+            recent_insights
+        ) = await asyncio.gather(
+            _with_fallback(_get_total_analyses(), 0, "total analyses"),
+            _with_fallback(_get_recent_analyses(limit=10), [], "recent analyses"),
+            _with_fallback(
+                _get_sentiment_breakdown(),
+                {"positive": 0.0, "neutral": 0.0, "negative": 0.0, "mixed": 0.0},
+                "sentiment breakdown"
+            ),
+            _with_fallback(_get_top_brands(limit=10), [], "top brands"),
+            _with_fallback(_get_recent_insights(limit=5), [], "recent insights")
+        )
         
         dashboard_data = {
             "totalAnalyses": total_analyses,
@@ -38,359 +58,371 @@ async def get_dashboard_data() -> Dict[str, Any]:
             "recentInsights": recent_insights
         }
         
-        logger.info(f"Dashboard data fetched successfully: {total_analyses} analyses")
-        return dashboard_data
+        logger.info("Dashboard data fetched successfully: %s analyses", total_analyses)
+        # Every value is already a JSON primitive, so skip jsonable_encoder
+        return ORJSONResponse(content=dashboard_data)
         
     except Exception as e:
-        logger.error(f"Error fetching dashboard data: {e}")
+        logger.error("Error fetching dashboard data: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to fetch dashboard data: {str(e)}")
 
+@_dashboard_cache
 async def _get_total_analyses() -> int:
     """Get total number of deep research analyses."""
-    try:
-        result = await db.execute_raw_sql(
-            "SELECT COUNT(*) as count FROM deep_research_analysis"
-        )
-        return result[0]['count'] if result else 0
-    except Exception as e:
-        logger.error(f"Error getting total analyses: {e}")
-        return 0
+    result = await db.execute_raw_sql(
+        "SELECT COALESCE(SUM(n), 0) as count FROM dashboard_stats_mv"
+    )
+    return int(result[0]['count']) if result else 0
 
+@_dashboard_cache
 async def _get_recent_analyses(limit: int = 10) -> List[Dict[str, Any]]:
     """Get recent deep research analyses."""
-    try:
-        result = await db.execute_raw_sql(
-            """
-            SELECT 
-                id,
-                brand_name,
-                overall_sentiment_tone,
-                overall_trust_score,
-                total_urls_analyzed,
-                created_at
-            FROM deep_research_analysis 
-            ORDER BY created_at DESC 
-            LIMIT $1
-            """,
-            [limit]
-        )
-        
-        analyses = []
-        for row in result:
-            analyses.append({
-                "id": str(row['id']),
-                "brand_name": row['brand_name'],
-                "overall_sentiment_tone": row['overall_sentiment_tone'],
-                "overall_trust_score": float(row['overall_trust_score']),
-                "total_urls_analyzed": row['total_urls_analyzed'],
-                "created_at": row['created_at'].isoformat() if row['created_at'] else None
-            })
-        
-        return analyses
-        
-    except Exception as e:
-        logger.error(f"Error getting recent analyses: {e}")
-        return []
+    result = await db.execute_raw_sql(
+        """
+        SELECT 
+            id,
+            brand_name,
+            overall_sentiment_tone,
+            overall_trust_score,
+            total_urls_analyzed,
+            created_at
+        FROM deep_research_analysis 
+        ORDER BY created_at DESC 
+        LIMIT $1
+        """,
+        [limit]
+    )
+    
+    analyses = []
+    for row in result:
+        analyses.append({
+            "id": str(row['id']),
+            "brand_name": row['brand_name'],
+            "overall_sentiment_tone": row['overall_sentiment_tone'],
+            "overall_trust_score": float(row['overall_trust_score']),
+            "total_urls_analyzed": row['total_urls_analyzed'],
+            "created_at": row['created_at'].isoformat() if row['created_at'] else None
+        })
+    
+    return analyses
 
+@_dashboard_cache
 async def _get_sentiment_breakdown() -> Dict[str, float]:
     """Get sentiment breakdown across all analyses."""
-    try:
-        result = await db.execute_raw_sql(
-            """
-            SELECT 
-                overall_sentiment_tone,
-                COUNT(*) as count,
-                ROUND(
-                    (COUNT(*) * 100.0 / (SELECT COUNT(*) FROM deep_research_analysis)), 
-                    1
-                ) as percentage
-            FROM deep_research_analysis 
-            GROUP BY overall_sentiment_tone
-            """
-        )
-        
-        # Initialize with zeros
-        breakdown = {
-            "positive": 0.0,
-            "neutral": 0.0,
-            "negative": 0.0,
-            "mixed": 0.0
-        }
-        
-        # Update with actual percentages
-        for row in result:
-            tone = row['overall_sentiment_tone']
-            if tone in breakdown:
-                breakdown[tone] = float(row['percentage'])
-        
-        return breakdown
-        
-    except Exception as e:
-        logger.error(f"Error getting sentiment breakdown: {e}")
-        return {"positive": 0.0, "neutral": 0.0, "negative": 0.0, "mixed": 0.0}
+    result = await db.execute_raw_sql(
+        """
+        SELECT 
+            SUM(positive_n) as positive,
+            SUM(neutral_n) as neutral,
+            SUM(negative_n) as negative,
+            SUM(mixed_n) as mixed,
+            SUM(n) as total
+        FROM dashboard_stats_mv
+        """
+    )
+    
+    # Initialize with zeros
+    breakdown = {
+        "positive": 0.0,
+        "neutral": 0.0,
+        "negative": 0.0,
+        "mixed": 0.0
+    }
+    
+    # Update with actual percentages
+    totals = result[0] if result else None
+    if totals and totals['total']:
+        for tone in breakdown:
+            breakdown[tone] = round(float(totals[tone]) * 100.0 / float(totals['total']), 1)
+    
+    return breakdown
 
+@_dashboard_cache
 async def _get_top_brands(limit: int = 10) -> List[Dict[str, Any]]:
     """Get top performing brands by trust score."""
-    try:
-        result = await db.execute_raw_sql(
-            """
-            SELECT 
-                brand_name,
-                ROUND(AVG(overall_trust_score), 1) as average_trust_score,
-                COUNT(*) as total_analyses
-            FROM deep_research_analysis 
-            GROUP BY brand_name 
-            HAVING COUNT(*) > 0
-            ORDER BY average_trust_score DESC 
-            LIMIT $1
-            """,
-            [limit]
-        )
-        
-        brands = []
-        for row in result:
-            brands.append({
-                "brand_name": row['brand_name'],
-                "average_trust_score": float(row['average_trust_score']),
-                "total_analyses": row['total_analyses']
-            })
-        
-        return brands
-        
-    except Exception as e:
-        logger.error(f"Error getting top brands: {e}")
-        return []
+    result = await db.execute_raw_sql(
+        """
+        SELECT 
+            brand_name,
+            ROUND(avg_trust, 1) as average_trust_score,
+            n as total_analyses
+        FROM dashboard_stats_mv 
+        ORDER BY avg_trust DESC 
+        LIMIT $1
+        """,
+        [limit]
+    )
+    
+    brands = []
+    for row in result:
+        brands.append({
+            "brand_name": row['brand_name'],
+            "average_trust_score": float(row['average_trust_score']),
+            "total_analyses": row['total_analyses']
+        })
+    
+    return brands
 
+@_dashboard_cache
 async def _get_recent_insights(limit: int = 5) -> List[Dict[str, Any]]:
     """Get recent insights from deep research analysis."""
-    try:
-        result = await db.execute_raw_sql(
-            """
-            SELECT 
-                id,
-                brand_name,
-                analysis_summary->>'overall_sentiment_tone' as sentiment_tone,
-                overall_trust_score,
-                created_at
-            FROM deep_research_analysis 
-            ORDER BY created_at DESC 
-            LIMIT $1
-            """,
-            [limit]
-        )
-        
-        insights = []
-        for row in result:
-            # Generate insight based on sentiment and trust score
-            sentiment = row['sentiment_tone'] or 'neutral'
-            trust_score = float(row['overall_trust_score']) if row['overall_trust_score'] else 0
-            
-            if sentiment == 'positive' and trust_score > 80:
-                insight = f"Strong positive sentiment with high trust score of {trust_score}"
-            elif sentiment == 'positive':
-                insight = f"Positive sentiment with trust score of {trust_score}"
-            elif sentiment == 'negative':
-                insight = f"Negative sentiment detected, trust score of {trust_score}"
-            elif sentiment == 'mixed':
-                insight = f"Mixed sentiment with trust score of {trust_score}"
-            else:
-                insight = f"Neutral sentiment with trust score of {trust_score}"
-            
-            insights.append({
-                "id": str(row['id']),
-                "brand_name": row['brand_name'],
-                "insight": insight,
-                "created_at": row['created_at'].isoformat() if row['created_at'] else None
-            })
-        
-        return insights
-        
-    except Exception as e:
-        logger.error(f"Error getting recent insights: {e}")
-        return []
+    result = await db.execute_raw_sql(
+        """
+        SELECT 
+            id,
+            brand_name,
+            analysis_summary->>'overall_sentiment_tone' as sentiment_tone,
+            overall_trust_score,
+            created_at
+        FROM deep_research_analysis 
+        ORDER BY created_at DESC 
+        LIMIT $1
+        """,
+        [limit]
+    )
+    
+    insights = []
+    for row in result:
+        # Generate insight based on sentiment and trust score
+        sentiment = row['sentiment_tone'] or 'neutral'
+        trust_score = float(row['overall_trust_score']) if row['overall_trust_score'] else 0
+        
+        if sentiment == 'positive' and trust_score > 80:
+            insight = f"Strong positive sentiment with high trust score of {trust_score}"
+        elif sentiment == 'positive':
+            insight = f"Positive sentiment with trust score of {trust_score}"
+        elif sentiment == 'negative':
+            insight = f"Negative sentiment detected, trust score of {trust_score}"
+        elif sentiment == 'mixed':
+            insight = f"Mixed sentiment with trust score of {trust_score}"
+        else:
+            insight = f"Neutral sentiment with trust score of {trust_score}"
+        
+        insights.append({
+            "id": str(row['id']),
+            "brand_name": row['brand_name'],
+            "insight": insight,
+            "created_at": row['created_at'].isoformat() if row['created_at'] else None
+        })
+    
+    return insights
 
-@router.get("/brand/{brand_name}")
-async def get_brand_dashboard(brand_name: str) -> Dict[str, Any]:
-    """Get dashboard data for a specific brand."""
+@router.get("/brand/{brand_name}", response_class=ORJSONResponse)
+async def get_brand_dashboard(
+    brand_name: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None
+) -> ORJSONResponse:
+    """Get dashboard data for a specific brand, one page of analyses at a time."""
+    before = None
+    if cursor:
+        try:
+            before = datetime.fromisoformat(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from None
+    
     try:
-        logger.info(f"Fetching dashboard data for brand: {brand_name}")
-        
-        # Get brand-specific analyses
-        brand_analyses = await _get_brand_analyses(brand_name)
-        
-        # Get brand sentiment trend
-        sentiment_trend = await _get_brand_sentiment_trend(brand_name)
+        logger.info("Fetching dashboard data for brand: %s", brand_name)
         
-        # Get brand competitors
-        competitors = await _get_brand_competitors(brand_name)
+        # Run the independent brand queries concurrently
+        brand_analyses, sentiment_trend = await asyncio.gather(
+            # One extra row tells us whether another page exists
+            _with_fallback(_get_brand_analyses(brand_name, limit + 1, before), [], "brand analyses"),
+            _with_fallback(_get_brand_sentiment_trend(brand_name), [], "brand sentiment trend")
+        )
         
-        # Get brand URL analysis details
-        url_details = await _get_brand_url_details(brand_name)
+        next_cursor = None
+        if len(brand_analyses) > limit:
+            brand_analyses = brand_analyses[:limit]
+            next_cursor = brand_analyses[-1]["created_at"]
+        
+        # Competitors and URL rows belong to the analyses on this page, so paging
+        # through the analyses pages through them too
+        analysis_ids = tuple(analysis["id"] for analysis in brand_analyses)
+        competitors, url_details = await asyncio.gather(
+            _with_fallback(_get_brand_competitors(analysis_ids), [], "brand competitors"),
+            _with_fallback(_get_brand_url_details(analysis_ids), [], "brand URL details")
+        )
         
         brand_data = {
             "brand_name": brand_name,
             "analyses": brand_analyses,
             "sentiment_trend": sentiment_trend,
             "competitors": competitors,
-            "url_details": url_details
+            "url_details": url_details,
+            "next_cursor": next_cursor
         }
         
-        return brand_data
+        return ORJSONResponse(content=brand_data)
         
     except Exception as e:
-        logger.error(f"Error fetching brand dashboard data: {e}")
+        logger.error("Error fetching brand dashboard data: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to fetch brand data: {str(e)}")
 
-async def _get_brand_analyses(brand_name: str) -> List[Dict[str, Any]]:
-    """Get all analyses for a specific brand."""
-    try:
-        result = await db.execute_raw_sql(
-            """
-            SELECT 
-                id,
-                overall_sentiment_tone,
-                overall_trust_score,
-                total_urls_analyzed,
-                positive_percentage,
-                neutral_percentage,
-                negative_percentage,
-                total_mention_count,
-                created_at
-            FROM deep_research_analysis 
-            WHERE brand_name = $1
-            ORDER BY created_at DESC
-            """,
-            [brand_name]
-        )
-        
-        analyses = []
-        for row in result:
-            analyses.append({
-                "id": str(row['id']),
-                "sentiment_tone": row['overall_sentiment_tone'],
-                "trust_score": float(row['overall_trust_score']),
-                "urls_analyzed": row['total_urls_analyzed'],
-                "sentiment_breakdown": {
-                    "positive": float(row['positive_percentage']),
-                    "neutral": float(row['neutral_percentage']),
-                    "negative": float(row['negative_percentage'])
-                },
-                "mention_count": row['total_mention_count'],
-                "created_at": row['created_at'].isoformat() if row['created_at'] else None
-            })
-        
-        return analyses
-        
-    except Exception as e:
-        logger.error(f"Error getting brand analyses: {e}")
-        return []
+@_dashboard_cache
+async def _get_brand_analyses(
+    brand_name: str,
+    limit: int = 50,
+    before: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """Get analyses for a specific brand, newest first, created before the cursor."""
+    result = await db.execute_raw_sql(
+        """
+        SELECT 
+            id,
+            overall_sentiment_tone,
+            overall_trust_score,
+            total_urls_analyzed,
+            positive_percentage,
+            neutral_percentage,
+            negative_percentage,
+            total_mention_count,
+            created_at
+        FROM deep_research_analysis 
+        WHERE brand_name = $1
+          AND ($2::timestamptz IS NULL OR created_at < $2)
+        ORDER BY created_at DESC
+        LIMIT $3
+        """,
+        [brand_name, before, limit]
+    )
+    
+    analyses = []
+    for row in result:
+        analyses.append({
+            "id": str(row['id']),
+            "sentiment_tone": row['overall_sentiment_tone'],
+            "trust_score": float(row['overall_trust_score']),
+            "urls_analyzed": row['total_urls_analyzed'],
+            "sentiment_breakdown": {
+                "positive": float(row['positive_percentage']),
+                "neutral": float(row['neutral_percentage']),
+                "negative": float(row['negative_percentage'])
+            },
+            "mention_count": row['total_mention_count'],
+            "created_at": row['created_at'].isoformat() if row['created_at'] else None
+        })
+    
+    return analyses
 
+@_dashboard_cache
 async def _get_brand_sentiment_trend(brand_name: str) -> List[Dict[str, Any]]:
-    """Get sentiment trend over time for a brand."""
-    try:
-        result = await db.execute_raw_sql(
-            """
-            SELECT 
-                DATE(created_at) as date,
-                overall_sentiment_tone,
-                positive_percentage,
-                neutral_percentage,
-                negative_percentage
-            FROM deep_research_analysis 
-            WHERE brand_name = $1
-            ORDER BY created_at ASC
-            """,
-            [brand_name]
-        )
-        
-        trend = []
-        for row in result:
-            trend.append({
-                "date": row['date'].isoformat() if row['date'] else None,
-                "sentiment_tone": row['overall_sentiment_tone'],
-                "sentiment_breakdown": {
-                    "positive": float(row['positive_percentage']),
-                    "neutral": float(row['neutral_percentage']),
-                    "negative": float(row['negative_percentage'])
-                }
-            })
-        
-        return trend
-        
-    except Exception as e:
-        logger.error(f"Error getting brand sentiment trend: {e}")
-        return []
+    """Get weekly sentiment trend over time for a brand."""
+    result = await db.execute_raw_sql(
+        """
+        SELECT 
+            DATE(date_trunc('week', created_at)) as date,
+            mode() WITHIN GROUP (ORDER BY overall_sentiment_tone) as overall_sentiment_tone,
+            AVG(positive_percentage) as positive_percentage,
+            AVG(neutral_percentage) as neutral_percentage,
+            AVG(negative_percentage) as negative_percentage,
+            COUNT(*) as analyses
+        FROM deep_research_analysis 
+        WHERE brand_name = $1
+        GROUP BY 1
+        ORDER BY 1 ASC
+        """,
+        [brand_name]
+    )
+    
+    trend = []
+    for row in result:
+        trend.append({
+            "date": row['date'].isoformat() if row['date'] else None,
+            "sentiment_tone": row['overall_sentiment_tone'],
+            "analyses": row['analyses'],
+            "sentiment_breakdown": {
+                "positive": float(row['positive_percentage']),
+                "neutral": float(row['neutral_percentage']),
+                "negative": float(row['negative_percentage'])
+            }
+        })
+    
+    return trend
 
-async def _get_brand_competitors(brand_name: str) -> List[Dict[str, Any]]:
-    """Get competitors mentioned alongside a brand."""
-    try:
-        result = await db.execute_raw_sql(
-            """
-            SELECT 
-                cm.competitor_name,
-                cm.total_mentions,
-                cm.average_favorability_score,
-                cm.mention_urls
-            FROM competitor_mentions cm
-            JOIN deep_research_analysis dra ON cm.deep_research_analysis_id = dra.id
-            WHERE dra.brand_name = $1
-            ORDER BY cm.total_mentions DESC
-            """,
-            [brand_name]
-        )
-        
-        competitors = []
-        for row in result:
-            competitors.append({
-                "name": row['competitor_name'],
-                "total_mentions": row['total_mentions'],
-                "favorability_score": float(row['average_favorability_score']),
-                "mention_urls": row['mention_urls'] or []
-            })
-        
-        return competitors
-        
-    except Exception as e:
-        logger.error(f"Error getting brand competitors: {e}")
+@_dashboard_cache
+async def _get_brand_competitors(analysis_ids: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    """Get competitors mentioned in the given analyses, most mentioned first."""
+    if not analysis_ids:
         return []
+    result = await db.execute_raw_sql(
+        """
+        SELECT 
+            competitor_name,
+            total_mentions,
+            average_favorability_score,
+            mention_urls
+        FROM competitor_mentions
+        WHERE deep_research_analysis_id = ANY($1::uuid[])
+        ORDER BY total_mentions DESC
+        """,
+        [list(analysis_ids)]
+    )
+    
+    competitors = []
+    for row in result:
+        competitors.append({
+            "name": row['competitor_name'],
+            "total_mentions": row['total_mentions'],
+            "favorability_score": float(row['average_favorability_score']),
+            "mention_urls": row['mention_urls'] or []
+        })
+    
+    return competitors
 
-async def _get_brand_url_details(brand_name: str) -> List[Dict[str, Any]]:
-    """Get detailed URL analysis for a brand."""
-    try:
-        result = await db.execute_raw_sql(
-            """
-            SELECT 
-                uar.url,
-                uar.title,
-                uar.sentiment_tone,
-                uar.mention_count,
-                uar.ai_recommendation_score,
-                uar.sentiment_reasoning,
-                uar.mention_reasoning,
-                uar.trust_reasoning
-            FROM url_analysis_results uar
-            JOIN deep_research_analysis dra ON uar.deep_research_analysis_id = dra.id
-            WHERE dra.brand_name = $1
-            ORDER BY uar.created_at DESC
-            """,
-            [brand_name]
-        )
-        
-        url_details = []
-        for row in result:
-            url_details.append({
-                "url": row['url'],
-                "title": row['title'],
-                "sentiment_tone": row['sentiment_tone'],
-                "mention_count": row['mention_count'],
-                "ai_recommendation_score": float(row['ai_recommendation_score']),
-                "sentiment_reasoning": row['sentiment_reasoning'],
-                "mention_reasoning": row['mention_reasoning'],
-                "trust_reasoning": row['trust_reasoning']
-            })
-        
-        return url_details
-        
-    except Exception as e:
-        logger.error(f"Error getting brand URL details: {e}")
+@_dashboard_cache
+async def _get_brand_url_details(analysis_ids: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    """Get detailed URL analysis for the given analyses, newest first."""
+    if not analysis_ids:
         return []
+    result = await db.execute_raw_sql(
+        """
+        SELECT 
+            url,
+            title,
+            sentiment_tone,
+            mention_count,
+            ai_recommendation_score,
+            sentiment_reasoning,
+            mention_reasoning,
+            trust_reasoning
+        FROM url_analysis_results
+        WHERE deep_research_analysis_id = ANY($1::uuid[])
+        ORDER BY created_at DESC
+        """,
+        [list(analysis_ids)]
+    )
+    
+    url_details = []
+    for row in result:
+        url_details.append({
+            "url": row['url'],
+            "title": row['title'],
+            "sentiment_tone": row['sentiment_tone'],
+            "mention_count": row['mention_count'],
+            "ai_recommendation_score": float(row['ai_recommendation_score']),
+            "sentiment_reasoning": row['sentiment_reasoning'],
+            "mention_reasoning": row['mention_reasoning'],
+            "trust_reasoning": row['trust_reasoning']
+        })
+    
+    return url_details
+
+
+_CACHED_QUERIES = (
+    _get_total_analyses,
+    _get_recent_analyses,
+    _get_sentiment_breakdown,
+    _get_top_brands,
+    _get_recent_insights,
+    _get_brand_analyses,
+    _get_brand_sentiment_trend,
+    _get_brand_competitors,
+    _get_brand_url_details,
+)
+
+
+def invalidate_dashboard_cache():
+    """Drop cached dashboard aggregates after new analysis data is written."""
+    for query in _CACHED_QUERIES:
+        query.cache_clear()
@@ -1,13 +1,32 @@
 """Health check API endpoints for Arrakis MVP."""
 
+import asyncio
 import logging
 import os
+import time
+from functools import lru_cache
+from typing import Any, Dict
 from fastapi import APIRouter
+from ..core.cache import async_ttl_cache
+from ..core.config import settings
 from ..core.logging import metrics
+from ..supabase.client import db
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api", tags=["health"])
 
+# Last formatted timestamp and the epoch second it was formatted for
+_TS_CACHE = ["", -1]
+
+
+def _iso_now() -> str:
+    """Current UTC time as an ISO 8601 string, formatted at most once per second."""
+    now = int(time.time())
+    if _TS_CACHE[1] != now:
+        _TS_CACHE[0] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now))
+        _TS_CACHE[1] = now
+    return _TS_CACHE[0]
+
 
 @router.get("/healthz")
 async def health_check():
@@ -20,22 +39,22 @@ async def health_check():
             "ok": True,
             "status": "healthy",
             "metrics": current_metrics,
-            "timestamp": "2024-01-01T00:00:00Z"
+            "timestamp": _iso_now()
         }
         
     except Exception as e:
-        logger.error(f"Health check failed: {e}")
+        logger.error("Health check failed: %s", e)
         return {
             "ok": False,
             "status": "unhealthy",
             "error": str(e),
-            "timestamp": "2024-01-01T00:00:00Z"
+            "timestamp": _iso_now()
         }
 
 
-@router.get("/health/readiness")
-async def readiness():
-    """Readiness check for external service dependencies."""
+@lru_cache(maxsize=1)
+def _readiness_snapshot() -> Dict[str, Any]:
+    """Read the environment once; it does not change for the life of the process."""
     openai_ok = bool(os.getenv("OPENAI_API_KEY"))
     pplx_ok = bool(os.getenv("PERPLEXITY_API_KEY"))
     target_sites = int(os.getenv("PPLX_TARGET_SITES", "50"))
@@ -46,3 +65,37 @@ async def readiness():
         "target_sites": target_sites,
         "status": "ready" if openai_ok and pplx_ok else "degraded"
     }
+
+
+# Probe results are cached briefly so frequent readiness checks don't hammer dependencies
+_probe_cache = async_ttl_cache(maxsize=1, ttl=10)
+
+
+@_probe_cache
+async def _probe_database() -> str:
+    """Check that the database answers a trivial query."""
+    if not settings.database_url:
+        return "not_configured"
+    try:
+        await asyncio.wait_for(db.execute_raw_sql("SELECT 1"), timeout=5)
+        return "ok"
+    except Exception as e:
+        logger.warning("Database readiness probe failed: %s", e)
+        return "unavailable"
+
+
+# Dependency probes run concurrently on each readiness check
+_PROBES = {
+    "database": _probe_database,
+}
+
+
+@router.get("/health/readiness")
+async def readiness():
+    """Readiness check for external service dependencies."""
+    snapshot = _readiness_snapshot()
+    results = await asyncio.gather(*(probe() for probe in _PROBES.values()))
+    probes = dict(zip(_PROBES, results, strict=True))
+    
+    ready = snapshot["status"] == "ready" and "unavailable" not in results
+    return {**snapshot, **probes, "status": "ready" if ready else "degraded"}
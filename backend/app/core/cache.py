@@ -0,0 +1,84 @@
+"""In-process caching helpers for Arrakis MVP."""
+
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+def async_ttl_cache(
+    maxsize: int = 128,
+    ttl: float = 30.0,
+    key_func: Callable[..., Hashable] | None = None,
+):
+    """
+    Cache the results of an async function for a bounded time.
+
+    Entries are keyed on the call arguments (or on ``key_func`` of them),
+    expire ``ttl`` seconds after they are stored and are evicted
+    least-recently-used beyond ``maxsize``. Concurrent calls with the same
+    key share one underlying call; its exceptions propagate to every caller
+    and are not cached. The wrapped function exposes ``cache_clear()`` for
+    explicit invalidation; calls that were already in flight when the cache
+    is cleared do not store their (possibly stale) result.
+
+    This cache is per process. With several workers, each one holds its own
+    copy and ``ttl`` bounds how stale the others can be after an invalidation.
+
+    Args:
+        maxsize: Maximum number of cached entries
+        ttl: Time to live of each entry in seconds
+        key_func: Builds the cache key from the call arguments, e.g. to leave
+            out arguments that should not be held by the cache
+
+    Returns:
+        Decorator for an async function
+    """
+
+    def decorator(func):
+        cache: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        inflight: dict[Hashable, asyncio.Future] = {}
+        generation = [0]
+
+        def store(key: Hashable, started_generation: int, task: asyncio.Future):
+            if inflight.get(key) is task:
+                del inflight[key]
+            if task.cancelled() or task.exception() is not None:
+                return
+            if started_generation == generation[0]:
+                cache[key] = (time.monotonic() + ttl, task.result())
+                cache.move_to_end(key)
+                if len(cache) > maxsize:
+                    cache.popitem(last=False)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if key_func is not None:
+                key = key_func(*args, **kwargs)
+            else:
+                key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+            entry = cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                cache.move_to_end(key)
+                return entry[1]
+
+            task = inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(func(*args, **kwargs))
+                inflight[key] = task
+                task.add_done_callback(functools.partial(store, key, generation[0]))
+            # A caller that is cancelled does not cancel the call shared with others
+            return await asyncio.shield(task)
+
+        def cache_clear():
+            """Drop all cached entries."""
+            generation[0] += 1
+            cache.clear()
+            inflight.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
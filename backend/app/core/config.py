@@ -27,6 +27,34 @@ class Settings(BaseSettings):
         le=100,
         description="Target number of websites for analysis"
     )
+    # The Perplexity limits below are for the whole instance; each of its
+    # web_concurrency worker processes enforces an equal share. Separate
+    # replicas each get the full amount.
+    perplexity_concurrency: int = Field(
+        default=8,
+        ge=1,
+        description="Maximum Perplexity requests in flight per instance"
+    )
+    perplexity_rpm: int = Field(
+        default=50,
+        ge=1,
+        description="Sustained Perplexity requests per minute per instance"
+    )
+    perplexity_burst: int = Field(
+        default=20,
+        ge=1,
+        description="Perplexity requests an instance may send at once before perplexity_rpm applies"
+    )
+    web_concurrency: int = Field(
+        default=1,
+        ge=1,
+        description="Worker processes serving the app (set by the arrakis entry point)"
+    )
+    perplexity_cache_ttl: int = Field(
+        default=3600,
+        ge=0,
+        description="Seconds to reuse the search results for an identical prompt"
+    )
 
     # Application
     app_name: str = Field(default="Arrakis MVP", description="Application name")
@@ -36,13 +64,30 @@ class Settings(BaseSettings):
         description="Allowed CORS origins"
     )
 
+    threadpool_size: int = Field(
+        default=200,
+        ge=1,
+        description="Worker threads for blocking calls run with asyncio.to_thread"
+    )
+
     # Rate limiting
     rate_limit_enabled: bool = Field(default=True, description="Enable rate limiting")
     rate_limit_requests: int = Field(default=100, ge=1, description="Requests per window")
     rate_limit_window: int = Field(default=60, ge=1, description="Rate limit window in seconds")
+    rate_limit_redis_url: Optional[str] = Field(
+        None,
+        description="Redis URL for rate limits shared across workers (in-memory only if unset)"
+    )
 
     # Database
     database_url: Optional[str] = Field(None, description="Database connection URL")
+    db_pool_min_size: int = Field(default=5, ge=1, description="Minimum raw SQL pool connections")
+    db_pool_max_size: int = Field(default=20, ge=1, description="Maximum raw SQL pool connections")
+    dashboard_cache_ttl: int = Field(
+        default=30,
+        ge=0,
+        description="Seconds to cache dashboard aggregate queries"
+    )
 
     @field_validator('supabase_url')
     @classmethod
@@ -3,13 +3,25 @@
 from fastapi.middleware.cors import CORSMiddleware
 from .config import settings
 
+_ALLOW_METHODS = ("*",)
+_ALLOW_HEADERS = ("*",)
+
+
+class FrozenOriginCORSMiddleware(CORSMiddleware):
+    """CORSMiddleware that checks request origins against a frozenset."""
+
+    def __init__(self, app, allow_origins=(), **kwargs):
+        super().__init__(app, allow_origins=allow_origins, **kwargs)
+        # Starlette tests `origin in self.allow_origins` on every CORS request
+        self.allow_origins = frozenset(allow_origins)
+
 
 def setup_cors(app):
     """Configure CORS middleware."""
     app.add_middleware(
-        CORSMiddleware,
-        allow_origins=settings.cors_origins,
+        FrozenOriginCORSMiddleware,
+        allow_origins=tuple(settings.cors_origins),
         allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+        allow_methods=_ALLOW_METHODS,
+        allow_headers=_ALLOW_HEADERS,
     )
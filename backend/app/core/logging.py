@@ -1,70 +1,116 @@
 """Logging configuration for Arrakis MVP."""
 
-import time
+import asyncio
+import atexit
 import logging
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+import logging.handlers
+import queue
+import time
+from array import array
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class _CachedTimeFormatter(logging.Formatter):
+    """Formatter that renders the seconds part of ``asctime`` once per second."""
 
+    def __init__(self, fmt: str):
+        super().__init__(fmt)
+        self._cached_second = None
+        self._cached_time = ""
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    def formatTime(self, record: logging.LogRecord, datefmt: str = None) -> str:
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_time = time.strftime(self.default_time_format, self.converter(record.created))
+            self._cached_second = second
+        return self.default_msec_format % (self._cached_time, record.msecs)
+
+
+# Configure logging. Records are handed to a queue and written by a background
+# thread, so request handlers never block on stream I/O.
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(
+    _CachedTimeFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 )
+_log_listener = logging.handlers.QueueListener(_log_queue, _stream_handler, respect_handler_level=True)
+
+# QueueHandler.prepare() formats the message before enqueueing; keep it to the bare
+# message so the stream handler applies the full format exactly once
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+_log_listener.start()
+# Flush whatever is still queued on interpreter shutdown
+atexit.register(_log_listener.stop)
 
 logger = logging.getLogger(__name__)
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Logging middleware for request/response tracking."""
+class LoggingMiddleware:
+    """Logging middleware for request/response tracking, as a pure ASGI app."""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = time.time()
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Skip the timing and send wrapper entirely when INFO is filtered out
+        if scope["type"] != "http" or not logger.isEnabledFor(logging.INFO):
+            await self.app(scope, receive, send)
+            return
+        
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        method = scope["method"]
+        path = scope["path"]
+        status_code = [500]
         
         # Log request
-        logger.info(f"Request: {request.method} {request.url.path}")
+        logger.info("Request: %s %s", method, path)
+        
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
         
         # Process request
-        response = await call_next(request)
+        await self.app(scope, receive, send_wrapper)
         
         # Calculate duration
-        duration = time.time() - start_time
+        duration = loop.time() - start_time
         
         # Log response
         logger.info(
-            f"Response: {request.method} {request.url.path} - "
-            f"Status: {response.status_code} - Duration: {duration:.3f}s"
+            "Response: %s %s - Status: %d - Duration: %.3fs",
+            method, path, status_code[0], duration
         )
-        
-        return response
 
 
 # Metrics counters
 class Metrics:
     """Simple metrics tracking."""
     
+    __slots__ = ("_counters",)
+    
+    _NAMES = ("runs_enqueued", "runs_completed", "insights_written", "judge_failures", "fallback_used")
+    _INDEX = {name: i for i, name in enumerate(_NAMES)}
+    
     def __init__(self):
-        self.runs_enqueued = 0
-        self.runs_completed = 0
-        self.insights_written = 0
-        self.judge_failures = 0
-        self.fallback_used = 0
+        # One unsigned 64-bit counter per metric, in _NAMES order
+        self._counters = array('Q', [0] * len(self._NAMES))
     
     def increment(self, metric: str):
         """Increment a metric counter."""
-        if hasattr(self, metric):
-            setattr(self, metric, getattr(self, metric) + 1)
+        index = self._INDEX.get(metric)
+        if index is not None:
+            self._counters[index] += 1
     
     def get_metrics(self) -> dict:
         """Get current metrics."""
-        return {
-            "runs_enqueued": self.runs_enqueued,
-            "runs_completed": self.runs_completed,
-            "insights_written": self.insights_written,
-            "judge_failures": self.judge_failures,
-            "fallback_used": self.fallback_used,
-        }
+        return dict(zip(self._NAMES, self._counters.tolist(), strict=True))
 
 
 # Global metrics instance
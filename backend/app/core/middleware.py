@@ -1,9 +1,12 @@
 """Middleware configuration for Arrakis MVP."""
 
 from fastapi import FastAPI
+from .cors import setup_cors
 from .logging import LoggingMiddleware
 
 
 def setup_middleware(app: FastAPI):
     """Configure all middleware."""
     app.add_middleware(LoggingMiddleware)
+    # Added last so it is outermost and answers preflight requests first
+    setup_cors(app)
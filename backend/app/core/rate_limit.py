@@ -1,32 +1,46 @@
-"""Rate limiting middleware for FastAPI."""
+"""Rate limiting for FastAPI routes."""
 
+import logging
 import time
-from collections import defaultdict
-from typing import Dict, Tuple
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from collections import OrderedDict
+from typing import Any, Callable, Coroutine, Tuple
+import redis.asyncio as redis
+from fastapi import Request, Response, HTTPException, status
+from fastapi.routing import APIRoute
 from .config import get_settings
 
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
 
 class RateLimiter:
     """
-    Simple in-memory rate limiter.
+    Simple in-memory token-bucket rate limiter.
+
+    Each client holds a bucket of up to ``requests_per_window`` tokens that
+    refills continuously over ``window_seconds``; every request spends one.
 
     For production use, consider using Redis or a dedicated rate limiting service.
     """
 
-    def __init__(self, requests_per_window: int = 100, window_seconds: int = 60):
+    def __init__(self, requests_per_window: int = 100, window_seconds: int = 60, max_clients: int = 50_000):
         """
         Initialize rate limiter.
 
         Args:
             requests_per_window: Maximum number of requests allowed per window
             window_seconds: Time window in seconds
+            max_clients: Maximum number of clients tracked before the least recently seen is evicted
         """
         self.requests_per_window = requests_per_window
         self.window_seconds = window_seconds
-        # Store: {ip: [(timestamp, count)]}
-        self.requests: Dict[str, list] = defaultdict(list)
+        self.refill_rate = requests_per_window / window_seconds
+        # Header values that never change, formatted once
+        self.limit_header = str(requests_per_window)
+        self.window_header = str(window_seconds)
+        self.max_clients = max_clients
+        # Store: {ip: (tokens, last_refill)}, least recently seen first
+        self.requests: OrderedDict[str, Tuple[float, float]] = OrderedDict()
 
     def is_allowed(self, client_ip: str) -> Tuple[bool, int]:
         """
@@ -38,105 +52,180 @@ class RateLimiter:
         Returns:
             Tuple of (is_allowed, remaining_requests)
         """
-        current_time = time.time()
-        window_start = current_time - self.window_seconds
-
-        # Remove old requests outside the current window
-        self.requests[client_ip] = [
-            (timestamp, count)
-            for timestamp, count in self.requests[client_ip]
-            if timestamp > window_start
-        ]
-
-        # Count requests in current window
-        total_requests = sum(count for _, count in self.requests[client_ip])
+        current_time = time.monotonic()
+        capacity = self.requests_per_window
+
+        # Refill the bucket for the time elapsed since the last request
+        bucket = self.requests.get(client_ip)
+        if bucket is None:
+            tokens, last_refill = capacity, current_time
+            # Bound memory against floods of spoofed client IPs; an evicted
+            # client simply starts again with a full bucket
+            if len(self.requests) >= self.max_clients:
+                self.requests.popitem(last=False)
+        else:
+            tokens, last_refill = bucket
+            self.requests.move_to_end(client_ip)
+        tokens = min(capacity, tokens + (current_time - last_refill) * self.refill_rate)
 
-        if total_requests >= self.requests_per_window:
+        if tokens < 1:
+            self.requests[client_ip] = (tokens, current_time)
             return False, 0
 
-        # Add current request
-        self.requests[client_ip].append((current_time, 1))
-
-        remaining = self.requests_per_window - total_requests - 1
-        return True, remaining
+        tokens -= 1
+        self.requests[client_ip] = (tokens, current_time)
+        return True, int(tokens)
 
     def clear_old_entries(self):
-        """Clear entries older than the time window to prevent memory bloat."""
-        current_time = time.time()
-        window_start = current_time - self.window_seconds
-
-        for ip in list(self.requests.keys()):
-            self.requests[ip] = [
-                (timestamp, count)
-                for timestamp, count in self.requests[ip]
-                if timestamp > window_start
-            ]
-            # Remove empty entries
-            if not self.requests[ip]:
+        """Drop clients whose buckets have refilled completely to prevent memory bloat."""
+        current_time = time.monotonic()
+        capacity = self.requests_per_window
+
+        for ip, (tokens, last_refill) in list(self.requests.items()):
+            if tokens + (current_time - last_refill) * self.refill_rate >= capacity:
                 del self.requests[ip]
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Middleware to apply rate limiting to requests."""
+class RedisRateLimiter:
+    """
+    Fixed-window rate limiter shared by every worker through Redis.
 
-    def __init__(self, app, rate_limiter: RateLimiter = None):
+    Each (client, window) pair is one Redis counter, incremented and given
+    its expiry in a single MULTI/EXEC round trip. Requires Redis 7+ for
+    ``EXPIRE ... NX``.
+    """
+
+    def __init__(self, redis_url: str, requests_per_window: int = 100, window_seconds: int = 60):
         """
-        Initialize rate limit middleware.
+        Initialize Redis rate limiter.
 
         Args:
-            app: FastAPI application
-            rate_limiter: RateLimiter instance (optional)
+            redis_url: Redis connection URL
+            requests_per_window: Maximum number of requests allowed per window
+            window_seconds: Time window in seconds
         """
-        super().__init__(app)
-        settings = get_settings()
-
-        if rate_limiter is None:
-            self.rate_limiter = RateLimiter(
-                requests_per_window=settings.rate_limit_requests,
-                window_seconds=settings.rate_limit_window
-            )
-        else:
-            self.rate_limiter = rate_limiter
-
-        self.enabled = settings.rate_limit_enabled
-
-    async def dispatch(self, request: Request, call_next):
-        """Process request with rate limiting."""
-        if not self.enabled:
-            return await call_next(request)
-
-        # Skip rate limiting for health checks
-        if request.url.path in ["/api/healthz", "/health", "/", "/docs", "/openapi.json"]:
-            return await call_next(request)
-
-        # Get client IP
-        client_ip = request.client.host if request.client else "unknown"
-
-        # Check if forwarded (behind proxy)
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            client_ip = forwarded_for.split(",")[0].strip()
-
-        # Check rate limit
-        is_allowed, remaining = self.rate_limiter.is_allowed(client_ip)
-
-        if not is_allowed:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Rate limit exceeded. Please try again later.",
-                headers={
-                    "Retry-After": str(self.rate_limiter.window_seconds),
-                    "X-RateLimit-Limit": str(self.rate_limiter.requests_per_window),
-                    "X-RateLimit-Remaining": "0",
-                }
-            )
-
-        # Process request
-        response = await call_next(request)
-
-        # Add rate limit headers to response
-        response.headers["X-RateLimit-Limit"] = str(self.rate_limiter.requests_per_window)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(int(time.time()) + self.rate_limiter.window_seconds)
-
-        return response
+        self.requests_per_window = requests_per_window
+        self.window_seconds = window_seconds
+        self.redis = redis.from_url(redis_url)
+
+    async def is_allowed(self, client_ip: str) -> Tuple[bool, int]:
+        """
+        Check if request from client is allowed.
+
+        Args:
+            client_ip: Client IP address
+
+        Returns:
+            Tuple of (is_allowed, remaining_requests)
+        """
+        # Wall clock, so every worker agrees on the window boundaries
+        window = int(time.time()) // self.window_seconds
+        key = f"rl:{client_ip}:{window}"
+
+        # NX only sets the expiry on the window's first request
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, self.window_seconds, nx=True)
+            count, _ = await pipe.execute()
+
+        if count > self.requests_per_window:
+            return False, 0
+        return True, self.requests_per_window - count
+
+    async def close(self):
+        """Close the Redis connection pool."""
+        await self.redis.aclose()
+
+
+def _client_ip(request: Request) -> str:
+    """Get the client IP, preferring the first X-Forwarded-For hop (behind proxy)."""
+    forwarded_for = request.headers.get("X-Forwarded-For")
+    if forwarded_for:
+        return forwarded_for.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def check_rate_limit(client_ip: str) -> Tuple[bool, int]:
+    """
+    Check the process-local limit and, when configured, the shared Redis limit.
+
+    Args:
+        client_ip: Client IP address
+
+    Returns:
+        Tuple of (is_allowed, remaining_requests)
+    """
+    is_allowed, remaining = rate_limiter.is_allowed(client_ip)
+
+    if is_allowed and redis_rate_limiter is not None:
+        try:
+            is_allowed, remaining = await redis_rate_limiter.is_allowed(client_ip)
+        except redis.RedisError as e:
+            # Fail open on the local limit rather than rejecting every request
+            logger.warning("Redis rate limit check failed: %s", e)
+
+    return is_allowed, remaining
+
+
+class RateLimitedRoute(APIRoute):
+    """
+    API route that applies rate limiting around its endpoint.
+
+    Used as the ``route_class`` of metered routers, so unmetered paths such as
+    health checks and docs never reach the limiter. A route class is used
+    rather than a router dependency because dependencies cannot add headers
+    to endpoints that return a ``Response`` directly.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def rate_limited_handler(request: Request) -> Response:
+            if not settings.rate_limit_enabled:
+                return await handler(request)
+
+            is_allowed, remaining = await check_rate_limit(_client_ip(request))
+
+            if not is_allowed:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Rate limit exceeded. Please try again later.",
+                    headers={
+                        "Retry-After": rate_limiter.window_header,
+                        "X-RateLimit-Limit": rate_limiter.limit_header,
+                        "X-RateLimit-Remaining": "0",
+                    }
+                )
+
+            response = await handler(request)
+
+            # Add rate limit headers to response
+            response.headers["X-RateLimit-Limit"] = rate_limiter.limit_header
+            response.headers["X-RateLimit-Remaining"] = str(remaining)
+            response.headers["X-RateLimit-Reset"] = str(int(time.time()) + rate_limiter.window_seconds)
+
+            return response
+
+        return rate_limited_handler
+
+
+# Process-wide limiter state shared by every metered route
+rate_limiter = RateLimiter(
+    requests_per_window=settings.rate_limit_requests,
+    window_seconds=settings.rate_limit_window
+)
+
+# Shared limit across workers; the in-memory limiter stays in front as a local burst guard
+redis_rate_limiter = None
+if settings.rate_limit_redis_url:
+    redis_rate_limiter = RedisRateLimiter(
+        settings.rate_limit_redis_url,
+        requests_per_window=settings.rate_limit_requests,
+        window_seconds=settings.rate_limit_window
+    )
+
+
+async def close_rate_limiter():
+    """Close the shared Redis rate limiter's connections, if one is configured."""
+    if redis_rate_limiter is not None:
+        await redis_rate_limiter.close()
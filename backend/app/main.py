@@ -1,38 +1,65 @@
 """Main FastAPI application for Arrakis MVP."""
 
+import asyncio
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-env_path = Path(__file__).parent.parent / ".env"
-load_dotenv(env_path)
+# Load environment variables from .env file, once per process tree: child
+# processes inherit the loaded variables along with the guard
+if not os.getenv("_DOTENV_LOADED"):
+    env_path = Path(__file__).parent.parent / ".env"
+    load_dotenv(env_path)
+    os.environ["_DOTENV_LOADED"] = "1"
 
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from .core.config import settings
-from .core.cors import setup_cors
 from .core.middleware import setup_middleware
-from .core.rate_limit import RateLimitMiddleware
+from .core.rate_limit import close_rate_limiter
 from .api import health, analytics, dashboard
+from .services.perplexity_client import close_perplexity_client
+from .supabase.client import db
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Set up process-wide resources on startup and release them on shutdown."""
+    if not settings.database_url:
+        logger.warning(
+            "DATABASE_URL is not configured: dashboard queries will return empty "
+            "results and readiness will report the database as not_configured"
+        )
+    # Blocking database calls run through asyncio.to_thread, which uses the loop's
+    # default executor (min(32, cpu_count + 4) threads unless sized here). The loop
+    # shuts the executor down when it closes.
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=settings.threadpool_size, thread_name_prefix="blocking")
+    )
+    yield
+    await close_perplexity_client()
+    await close_rate_limiter()
+    await db.close()
+
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.app_name,
     description="AI-Powered Brand Intelligence System",
     version="1.0.0",
-    debug=settings.debug
+    debug=settings.debug,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# Setup middleware (logging, error handling, etc.)
+# Setup middleware (logging, CORS)
 setup_middleware(app)
 
-# Add rate limiting middleware
-app.add_middleware(RateLimitMiddleware)
-
-# Setup CORS
-setup_cors(app)
-
 # Include API routes
 app.include_router(health.router)
 app.include_router(analytics.router)
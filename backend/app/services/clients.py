@@ -2,14 +2,26 @@
 
 import os
 import logging
+import threading
 from openai import OpenAI
 
 logger = logging.getLogger(__name__)
 
 _OPENAI_CLIENT = None
+# Guards construction only; reads of an existing client take no lock
+_OPENAI_CLIENT_LOCK = threading.Lock()
 
 def get_openai_client():
     """Get or create OpenAI client singleton."""
+    client = _OPENAI_CLIENT
+    if client is not None:
+        return client
+
+    with _OPENAI_CLIENT_LOCK:
+        return _create_openai_client()
+
+def _create_openai_client():
+    """Create the OpenAI client unless another thread already has. Caller holds the lock."""
     global _OPENAI_CLIENT
     if _OPENAI_CLIENT is not None:
         return _OPENAI_CLIENT
@@ -24,10 +36,19 @@ def get_openai_client():
         logger.info("OpenAI client initialized successfully")
         return _OPENAI_CLIENT
     except Exception as e:
-        logger.exception(f"Failed to initialize OpenAI client: {e}")
+        logger.exception("Failed to initialize OpenAI client: %s", e)
         return None
 
 def reset_openai_client():
     """Reset OpenAI client (useful for testing)."""
     global _OPENAI_CLIENT
     _OPENAI_CLIENT = None
+
+def _reset_after_fork():
+    """Give a forked worker its own lock and client instead of the parent's connection pool."""
+    global _OPENAI_CLIENT, _OPENAI_CLIENT_LOCK
+    _OPENAI_CLIENT = None
+    _OPENAI_CLIENT_LOCK = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,13 +1,132 @@
 """Perplexity AI client for web search and crawling."""
 
+import asyncio
 import os
 import logging
+import re
+import time
+from itertools import chain, repeat
 from typing import Dict, List, Any, Optional
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, AsyncStream
+from openai.types.chat import ChatCompletion, ChatCompletionChunk, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from app.core.cache import async_ttl_cache
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Host of a citation URL, without a leading "www."
+_DOMAIN_RE = re.compile(r"^https?://(?:www\.)?([^/?#]+)", re.IGNORECASE)
+_domain_match = _DOMAIN_RE.match
+
+
+def _search_key(client: "PerplexityClient", prompt: str, target_websites: int):
+    """Key searches on their inputs only, so the cache neither splits nor holds clients."""
+    return prompt, target_websites
+
+
+# Aggregated search results, shared between identical prompts across client instances
+_search_cache = async_ttl_cache(
+    maxsize=512,
+    ttl=settings.perplexity_cache_ttl,
+    key_func=_search_key
+)
+
+# Suffixes appended to the prompt to diversify the search queries
+_QUERY_SUFFIXES = (
+    "",
+    " latest news and updates",
+    " industry analysis and trends",
+    " market research and statistics",
+    " expert opinions and reviews",
+    " competitive analysis",
+    " customer feedback and reviews",
+    " financial performance and metrics",
+    " technology and innovation",
+    " regulatory and compliance",
+    " social media presence",
+    " press releases and announcements",
+    " academic research and studies",
+    " industry reports and whitepapers",
+    " case studies and success stories",
+)
+# Extra queries for prompts that name one of these companies
+_COMPANY_TOKENS = frozenset({'tesla', 'apple', 'google', 'microsoft', 'amazon'})
+_COMPANY_QUERY_SUFFIXES = (
+    " company overview and history",
+    " leadership team and management",
+    " products and services portfolio",
+    " global presence and expansion",
+    " sustainability and corporate responsibility",
+)
+
+# Relevance by rank after aggregation: a gradual decrease down to a floor,
+# precomputed for the first 50 ranks (the default target)
+_MIN_RELEVANCE_SCORE = 0.1
+_RELEVANCE_SCORES = tuple(max(_MIN_RELEVANCE_SCORE, 1.0 - (i * 0.02)) for i in range(50))
+
+# Keywords for the per-response sentiment estimate, matched as whole words
+_WORD_RE = re.compile(r"[a-z]+")
+_POSITIVE_WORDS = frozenset({'good', 'great', 'excellent', 'positive', 'success', 'growth', 'improve'})
+_NEGATIVE_WORDS = frozenset({'bad', 'poor', 'negative', 'decline', 'problem', 'issue', 'concern'})
+
+
+class TokenBucket:
+    """Async token bucket shared by the coroutines that call one API."""
+    
+    def __init__(self, capacity: float, rate: float):
+        """
+        Initialize a full bucket.
+        
+        Args:
+            capacity: Maximum burst size in tokens
+            rate: Tokens added per second
+        """
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+    
+    async def acquire(self, cost: float = 1):
+        """
+        Take ``cost`` tokens, sleeping until they have been refilled if needed.
+        
+        The tokens are reserved before sleeping (the balance may go negative), so
+        concurrent callers queue up behind each other instead of all waking at
+        once for the same refill. A caller cancelled while waiting hands its
+        reservation back.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+        self.tokens -= cost
+        if self.tokens < 0:
+            try:
+                await asyncio.sleep(-self.tokens / self.rate)
+            except asyncio.CancelledError:
+                self.tokens += cost
+                raise
+
+
+# Process-wide Perplexity request budget, shared by every search so concurrent
+# analyses stay within the API quota together. The configured limits are for
+# the whole instance, so each of its web_concurrency workers takes an equal
+# share: bursts of perplexity_burst / workers requests refilled at
+# perplexity_rpm / workers per minute, with perplexity_concurrency / workers
+# requests in flight. With the defaults (burst 20, the most queries one search
+# issues, at 50 rpm) and one worker, a search on an idle process is never
+# throttled; one that overlaps it waits about 1.2s per query beyond the
+# remaining burst, so up to ~24s for a full 20-query search. With N workers each
+# worker's burst and rate shrink N-fold, so those waits grow N-fold.
+_WORKERS = settings.web_concurrency
+_RATE_LIMITER = TokenBucket(
+    capacity=max(1.0, settings.perplexity_burst / _WORKERS),
+    rate=settings.perplexity_rpm / 60 / _WORKERS
+)
+_CONCURRENCY = asyncio.Semaphore(max(1, settings.perplexity_concurrency // _WORKERS))
+
+
 class PerplexityClient:
     """Client for interacting with Perplexity AI API."""
     
@@ -17,13 +136,28 @@ class PerplexityClient:
             logger.warning("Perplexity API key not configured")
             self.client = None
             return
-            
-        self.client = OpenAI(
+        
+        # One long-lived HTTP/2 connection pool shared by every query, so concurrent
+        # queries are multiplexed as streams over a single TLS connection. Pool
+        # settings live on the transport; the client ignores them once one is given.
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=2,  # Retry failed connection attempts only, never sent requests
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+        self._http_client = httpx.AsyncClient(http2=True, transport=transport, timeout=30.0)
+        self.client = AsyncOpenAI(
             api_key=settings.perplexity_api_key,
-            base_url="https://api.perplexity.ai"
+            base_url="https://api.perplexity.ai",
+            http_client=self._http_client
         )
         logger.info("Perplexity AI client initialized successfully")
     
+    async def close(self):
+        """Close the underlying HTTP connection pool."""
+        if self.client:
+            await self._http_client.aclose()
+    
     async def search_and_analyze(self, prompt: str, target_websites: int = 50) -> Dict[str, Any]:
         """
         Perform comprehensive web search and analysis to reach target number of websites.
@@ -39,56 +173,88 @@ class PerplexityClient:
             return self._fallback_response(prompt)
         
         try:
-            logger.info(f"Starting comprehensive Perplexity AI search for: {prompt}")
-            logger.info(f"Target: {target_websites} websites")
-            
-            # Generate multiple search queries to get diverse results
-            search_queries = self._generate_diverse_search_queries(prompt)
-            logger.info(f"Generated {len(search_queries)} search queries")
-            
-            all_results = []
-            total_websites = 0
-            query_count = 0
-            
-            # Make multiple API calls to reach target website count
-            for query in search_queries:
-                if total_websites >= target_websites:
-                    break
-                    
-                query_count += 1
-                logger.info(f"Query {query_count}/{len(search_queries)}: {query[:100]}...")
-                
+            return await self._search(prompt, target_websites)
+        except Exception as e:
+            logger.error("Perplexity API call failed: %s", e)
+            return self._fallback_response(prompt)
+    
+    @_search_cache
+    async def _search(self, prompt: str, target_websites: int) -> Dict[str, Any]:
+        """
+        Run the multi-query search for a prompt, sharing results between identical calls.
+        
+        Results are cached for ``perplexity_cache_ttl`` seconds and concurrent calls for
+        the same prompt share one search. A search that found no sources raises instead
+        of returning, so that failures are not cached.
+        
+        Args:
+            prompt: The search prompt
+            target_websites: Target number of websites to crawl
+        
+        Returns:
+            Aggregated search results
+        
+        Raises:
+            RuntimeError: If no query returned any sources
+        """
+        logger.info("Starting comprehensive Perplexity AI search for: %s", prompt)
+        logger.info("Target: %s websites", target_websites)
+        
+        # Generate multiple search queries to get diverse results
+        search_queries = self._generate_diverse_search_queries(prompt)
+        logger.info("Generated %s search queries", len(search_queries))
+        
+        all_results = []
+        total_websites = 0
+        
+        async def _numbered_call(query_number: int, query: str):
+            logger.info("Query %s/%s: %s...", query_number, len(search_queries), query[:100])
+            return query_number, await self._make_perplexity_call(query)
+        
+        # Issue the queries concurrently (the shared limits in _make_perplexity_call
+        # decide how many are in flight) and stop as soon as enough websites have
+        # been collected
+        tasks = [
+            asyncio.create_task(_numbered_call(query_number, query))
+            for query_number, query in enumerate(search_queries, 1)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
                 try:
-                    # Make the API call
-                    response = await self._make_perplexity_call(query)
+                    query_number, response = await next_done
                     
-                    if response and 'choices' in response and response['choices']:
+                    if response is not None and response.choices:
                         # Parse the response
                         parsed_result = self._parse_perplexity_response(response)
                         
                         if parsed_result['crawled_content']:
-                            all_results.append(parsed_result)
+                            all_results.append((query_number, parsed_result))
                             total_websites += len(parsed_result['crawled_content'])
-                            logger.info(f"Query {query_count} found {len(parsed_result['crawled_content'])} sources. Total: {total_websites}")
-                        
-                        # Add delay between queries to avoid rate limiting
-                        if query_count < len(search_queries):
-                            import asyncio
-                            await asyncio.sleep(1)
+                            logger.info("Query %s found %s sources. Total: %s", query_number, len(parsed_result['crawled_content']), total_websites)
                     
                 except Exception as e:
-                    logger.error(f"Error in query {query_count}: {e}")
+                    logger.error("Error in query: %s", e)
                     continue
-            
-            # Aggregate all results
-            aggregated_result = self._aggregate_results(all_results, target_websites)
-            
-            logger.info(f"Comprehensive search completed. Found {len(aggregated_result['crawled_content'])} total sources")
-            return aggregated_result
-            
-        except Exception as e:
-            logger.error(f"Perplexity API call failed: {e}")
-            return self._fallback_response(prompt)
+                
+                if total_websites >= target_websites:
+                    break
+        finally:
+            # Drop queries that are still queued or in flight
+            for task in tasks:
+                task.cancel()
+        
+        if not all_results:
+            raise RuntimeError("No Perplexity query returned any sources")
+        
+        # Keep query order so the aggregated ranking does not depend on completion order
+        all_results.sort(key=lambda item: item[0])
+        all_results = [result for _, result in all_results]
+        
+        # Aggregate all results
+        aggregated_result = self._aggregate_results(all_results, target_websites)
+        
+        logger.info("Comprehensive search completed. Found %s total sources", len(aggregated_result['crawled_content']))
+        return aggregated_result
     
     def _generate_diverse_search_queries(self, base_prompt: str) -> List[str]:
         """
@@ -100,43 +266,16 @@ class PerplexityClient:
         Returns:
             List of diverse search queries
         """
-        # Extract key terms from the prompt
-        prompt_lower = base_prompt.lower()
-        
-        # Base queries
-        queries = [
-            base_prompt,
-            f"{base_prompt} latest news and updates",
-            f"{base_prompt} industry analysis and trends",
-            f"{base_prompt} market research and statistics",
-            f"{base_prompt} expert opinions and reviews",
-            f"{base_prompt} competitive analysis",
-            f"{base_prompt} customer feedback and reviews",
-            f"{base_prompt} financial performance and metrics",
-            f"{base_prompt} technology and innovation",
-            f"{base_prompt} regulatory and compliance",
-            f"{base_prompt} social media presence",
-            f"{base_prompt} press releases and announcements",
-            f"{base_prompt} academic research and studies",
-            f"{base_prompt} industry reports and whitepapers",
-            f"{base_prompt} case studies and success stories"
-        ]
+        queries = [base_prompt + suffix for suffix in _QUERY_SUFFIXES]
         
         # Add company-specific queries if company name is detected
-        if any(word in prompt_lower for word in ['tesla', 'apple', 'google', 'microsoft', 'amazon']):
-            company_queries = [
-                f"{base_prompt} company overview and history",
-                f"{base_prompt} leadership team and management",
-                f"{base_prompt} products and services portfolio",
-                f"{base_prompt} global presence and expansion",
-                f"{base_prompt} sustainability and corporate responsibility"
-            ]
-            queries.extend(company_queries)
+        if not _COMPANY_TOKENS.isdisjoint(_WORD_RE.findall(base_prompt.lower())):
+            queries.extend(base_prompt + suffix for suffix in _COMPANY_QUERY_SUFFIXES)
         
         # Limit to reasonable number of queries to avoid excessive API calls
         return queries[:20]
     
-    async def _make_perplexity_call(self, query: str) -> Optional[Dict[str, Any]]:
+    async def _make_perplexity_call(self, query: str) -> Optional[ChatCompletion]:
         """
         Make a single API call to Perplexity AI.
         
@@ -144,38 +283,101 @@ class PerplexityClient:
             query: The search query
             
         Returns:
-            API response or None if failed
+            API response object or None if failed
         """
         try:
-            # Use sonar model for web search capabilities
-            # Based on latest Perplexity docs: https://docs.perplexity.ai/getting-started/overview
-            # Correct model names: sonar, sonar-reasoning, sonar-deep-research
-            response = self.client.chat.completions.create(
-                model="sonar",  # Lightweight search model with grounding
-                messages=[
-                    {
-                        "role": "user",
-                        "content": query
-                    }
-                ],
-                max_tokens=2000,
-                temperature=0.1,  # Low temperature for consistent analysis
-                # Remove unsupported parameters - Perplexity handles web search automatically
-                # when using online models like sonar
-            )
-            
-            return response.model_dump()
+            # Wait for the request budget before taking a concurrency slot, so
+            # throttled queries do not hold slots while they sleep
+            await _RATE_LIMITER.acquire()
+            async with _CONCURRENCY:
+                # Use sonar model for web search capabilities
+                # Based on latest Perplexity docs: https://docs.perplexity.ai/getting-started/overview
+                # Correct model names: sonar, sonar-reasoning, sonar-deep-research
+                stream = await self.client.chat.completions.create(
+                    model="sonar",  # Lightweight search model with grounding
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": query
+                        }
+                    ],
+                    max_tokens=2000,
+                    temperature=0.1,  # Low temperature for consistent analysis
+                    stream=True,
+                    # Remove unsupported parameters - Perplexity handles web search automatically
+                    # when using online models like sonar
+                )
+                
+                # Streamed so that a search which has already reached its target can
+                # cancel this call mid-generation; leaving the block closes the stream
+                async with stream:
+                    return await self._collect_stream(stream)
             
         except Exception as e:
-            logger.error(f"Perplexity API call failed: {e}")
+            logger.error("Perplexity API call failed: %s", e)
+            return None
+    
+    @staticmethod
+    async def _collect_stream(stream: AsyncStream[ChatCompletionChunk]) -> Optional[ChatCompletion]:
+        """
+        Assemble streamed chunks into a completion, returning as soon as it finishes.
+        
+        Args:
+            stream: Chunk stream of a chat completion request
+            
+        Returns:
+            The assembled completion, or None if the stream was empty
+        """
+        first_chunk = None
+        content_parts = []
+        citations = []
+        usage = None
+        finish_reason = None
+        
+        async for chunk in stream:
+            if first_chunk is None:
+                first_chunk = chunk
+            # Perplexity repeats the citations (an extra field) and running usage on chunks
+            chunk_citations = getattr(chunk, 'citations', None)
+            if chunk_citations:
+                citations = chunk_citations
+            if chunk.usage:
+                usage = chunk.usage
+            if chunk.choices:
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    content_parts.append(choice.delta.content)
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+                    break
+        
+        if first_chunk is None:
             return None
+        
+        # Built without validation: every field comes from already-parsed chunks
+        return ChatCompletion.model_construct(
+            id=first_chunk.id,
+            object="chat.completion",
+            created=first_chunk.created,
+            model=first_chunk.model,
+            choices=[Choice.model_construct(
+                index=0,
+                finish_reason=finish_reason,
+                message=ChatCompletionMessage.model_construct(role="assistant", content="".join(content_parts))
+            )],
+            usage=usage,
+            citations=citations
+        )
     
-    def _parse_perplexity_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
+    def _parse_perplexity_response(self, response: ChatCompletion) -> Dict[str, Any]:
         """
         Parse the Perplexity API response.
         
+        Reads the few fields needed straight off the response object rather than
+        dumping the whole model to nested dicts first.
+        
         Args:
-            response: Raw API response
+            response: Raw API response object
             
         Returns:
             Parsed and structured data
@@ -183,14 +385,14 @@ class PerplexityClient:
         try:
             # Extract the main content
             content = ""
-            if 'choices' in response and response['choices']:
-                content = response['choices'][0].get('message', {}).get('content', '')
+            if response.choices:
+                content = response.choices[0].message.content or ''
             
-            # Extract citations (URLs)
-            citations = response.get('citations', [])
+            # Extract citations (URLs); a Perplexity extension kept as an extra field
+            citations = getattr(response, 'citations', None) or []
             
             # Extract usage information
-            usage = response.get('usage', {})
+            usage = response.usage.model_dump() if response.usage else {}
             
             # Generate crawled content from citations
             crawled_content = self._format_citations_as_content(citations)
@@ -207,7 +409,7 @@ class PerplexityClient:
             }
             
         except Exception as e:
-            logger.error(f"Error parsing Perplexity response: {e}")
+            logger.error("Error parsing Perplexity response: %s", e)
             return self._fallback_response("")
     
     def _format_citations_as_content(self, citations: List[str]) -> List[Dict[str, Any]]:
@@ -224,13 +426,8 @@ class PerplexityClient:
         
         for i, url in enumerate(citations):
             # Extract domain from URL
-            try:
-                from urllib.parse import urlparse
-                parsed_url = urlparse(url)
-                domain = parsed_url.netloc
-                source = domain.replace('www.', '')
-            except:
-                source = "unknown"
+            match = _domain_match(url) if isinstance(url, str) else None
+            source = match.group(1) if match else "unknown"
             
             crawled_content.append({
                 'title': f"Source {i+1} from {source}",
@@ -266,13 +463,11 @@ class PerplexityClient:
             'competitors': []
         }
         
-        # Simple sentiment analysis based on content
-        positive_words = ['good', 'great', 'excellent', 'positive', 'success', 'growth', 'improve']
-        negative_words = ['bad', 'poor', 'negative', 'decline', 'problem', 'issue', 'concern']
-        
-        content_lower = content.lower()
-        positive_count = sum(1 for word in positive_words if word in content_lower)
-        negative_count = sum(1 for word in negative_words if word in content_lower)
+        # Simple sentiment analysis based on content: tokenize once, then count
+        # how many of the keywords appear as whole words
+        words = set(_WORD_RE.findall(content.lower()))
+        positive_count = len(_POSITIVE_WORDS & words)
+        negative_count = len(_NEGATIVE_WORDS & words)
         
         if positive_count > negative_count:
             insights['sentiment']['label'] = 'positive'
@@ -294,44 +489,36 @@ class PerplexityClient:
         Returns:
             Aggregated result
         """
-        # Combine all crawled content
-        all_crawled_content = []
-        all_citations = []
+        # Combine all crawled content, dropping duplicate URLs in the same pass
         all_usage = {'total_tokens': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+        # Keyed by URL; setdefault keeps the first entry seen for each, in order
+        unique_by_url: Dict[str, Dict[str, Any]] = {}
         
         for result in all_results:
-            if 'crawled_content' in result:
-                all_crawled_content.extend(result['crawled_content'])
-            if 'citations' in result:
-                all_citations.extend(result['citations'])
+            for content in result.get('crawled_content', ()):
+                unique_by_url.setdefault(content['url'], content)
             if 'usage' in result:
                 for key in all_usage:
                     all_usage[key] += result['usage'].get(key, 0)
         
-        # Remove duplicates based on URL
-        seen_urls = set()
-        unique_crawled_content = []
-        
-        for content in all_crawled_content:
-            if content['url'] not in seen_urls:
-                seen_urls.add(content['url'])
-                unique_crawled_content.append(content)
+        unique_crawled_content = list(unique_by_url.values())
         
         # Limit to target number of websites
         if len(unique_crawled_content) > target_websites:
             unique_crawled_content = unique_crawled_content[:target_websites]
         
         # Re-rank the content
-        for i, content in enumerate(unique_crawled_content):
-            content['rank'] = i + 1
-            content['relevance_score'] = max(0.1, 1.0 - (i * 0.02))  # Gradual decrease in relevance
+        scores = chain(_RELEVANCE_SCORES, repeat(_MIN_RELEVANCE_SCORE))
+        for rank, (content, score) in enumerate(zip(unique_crawled_content, scores, strict=False), 1):
+            content['rank'] = rank
+            content['relevance_score'] = score
         
         # Generate comprehensive insights
         comprehensive_insights = self._generate_comprehensive_insights(unique_crawled_content)
         
         return {
             'content': f"Comprehensive analysis based on {len(unique_crawled_content)} web sources",
-            'citations': list(set(all_citations)),  # Remove duplicate URLs
+            'citations': [content['url'] for content in unique_crawled_content],
             'usage': all_usage,
             'crawled_content': unique_crawled_content,
             'insights': comprehensive_insights,
@@ -349,12 +536,14 @@ class PerplexityClient:
         Returns:
             Comprehensive insights
         """
-        # Analyze source diversity
-        sources = [content['source'] for content in crawled_content]
-        unique_sources = list(set(sources))
+        # Analyze source diversity and average relevance in a single pass
+        unique_sources = set()
+        relevance_sum = 0.0
+        for content in crawled_content:
+            unique_sources.add(content['source'])
+            relevance_sum += content['relevance_score']
         
-        # Calculate average relevance
-        avg_relevance = sum(content['relevance_score'] for content in crawled_content) / len(crawled_content) if crawled_content else 0
+        avg_relevance = relevance_sum / len(crawled_content) if crawled_content else 0
         
         insights = {
             'sentiment': {
@@ -393,3 +582,28 @@ class PerplexityClient:
             'search_queries': [prompt],
             'total_sources_analyzed': 0
         }
+
+
+_client_singleton: Optional[PerplexityClient] = None
+
+
+async def get_perplexity_client() -> PerplexityClient:
+    """
+    Get or create the shared Perplexity client, reusing its warm connection pool.
+    
+    Async so that FastAPI runs it on the event loop rather than in the threadpool:
+    with no await between the check and the assignment, concurrent first requests
+    cannot each build (and leak) a client.
+    """
+    global _client_singleton
+    if _client_singleton is None:
+        _client_singleton = PerplexityClient()
+    return _client_singleton
+
+
+async def close_perplexity_client():
+    """Close the shared Perplexity client's connection pool, if it was created."""
+    global _client_singleton
+    if _client_singleton is not None:
+        await _client_singleton.close()
+        _client_singleton = None
@@ -1,7 +1,8 @@
 """Supabase client for Arrakis MVP."""
 
 import asyncio
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Union
+import asyncpg
 from supabase import create_client, Client
 from ..core.config import settings
 
@@ -14,82 +15,105 @@ class SupabaseClient:
             settings.supabase_url,
             settings.supabase_service_key
         )
+        # Direct Postgres pool for raw SQL, created on first use
+        self._pool: Optional[asyncpg.Pool] = None
+        self._pool_lock = asyncio.Lock()
+    
+    async def _get_pool(self) -> asyncpg.Pool:
+        """Get or create the shared asyncpg connection pool."""
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    if not settings.database_url:
+                        raise RuntimeError("DATABASE_URL is not configured")
+                    self._pool = await asyncpg.create_pool(
+                        settings.database_url,
+                        min_size=settings.db_pool_min_size,
+                        max_size=settings.db_pool_max_size
+                    )
+        return self._pool
+    
+    async def execute_raw_sql(self, query: str, params: Optional[List[Any]] = None) -> List[asyncpg.Record]:
+        """Execute a raw SQL query with positional ($1, $2, ...) parameters."""
+        pool = await self._get_pool()
+        return await pool.fetch(query, *(params or []))
+    
+    async def close(self):
+        """Close the raw SQL connection pool."""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
     
     async def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Execute a raw SQL query."""
-        loop = asyncio.get_event_loop()
         try:
-            result = await loop.run_in_executor(
-                None, 
-                lambda: self.client.rpc('exec_sql', {'query': query, 'params': params or {}})
+            result = await asyncio.to_thread(
+                self.client.rpc, 'exec_sql', {'query': query, 'params': params or {}}
             )
             return result.data if result.data else []
         except Exception as e:
             # Fallback to direct client call for simple queries
             try:
-                result = await loop.run_in_executor(
-                    None,
-                    lambda: self.client.table('brands').select('*').execute()
-                )
+                result = await asyncio.to_thread(self.client.table('brands').select('*').execute)
                 return result.data if result.data else []
             except Exception as fallback_error:
                 raise Exception(f"Database query failed: {e}, fallback failed: {fallback_error}")
     
-    async def insert(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Insert data into a table."""
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
-            lambda: self.client.table(table).insert(data).execute()
-        )
+    async def insert(
+        self,
+        table: str,
+        data: Union[Dict[str, Any], List[Dict[str, Any]]]
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """Insert a row, or a list of rows in a single bulk request, into a table."""
+        if isinstance(data, list) and not data:
+            return []
+        result = await asyncio.to_thread(self.client.table(table).insert(data).execute)
+        if isinstance(data, list):
+            return result.data if result.data else []
         return result.data[0] if result.data else {}
     
+    @staticmethod
+    def _apply_filters(query, filters: Dict[str, Any]):
+        """Apply the non-None filters as equality conditions in a single match()."""
+        conditions = {key: value for key, value in filters.items() if value is not None}
+        return query.match(conditions) if conditions else query
+    
     async def select(self, table: str, **filters) -> List[Dict[str, Any]]:
         """Select data from a table with filters."""
-        loop = asyncio.get_event_loop()
         query = self.client.table(table).select('*')
+        query = self._apply_filters(query, filters)
         
-        # Apply filters
-        for key, value in filters.items():
-            if value is not None:
-                query = query.eq(key, value)
-        
-        result = await loop.run_in_executor(None, lambda: query.execute())
+        result = await asyncio.to_thread(query.execute)
+        return result.data if result.data else []
+    
+    async def select_in(self, table: str, column: str, values: Iterable[Any]) -> List[Dict[str, Any]]:
+        """Select the rows whose column is any of the given values, in one request."""
+        values = list(values)
+        if not values:
+            return []
+        query = self.client.table(table).select('*').in_(column, values)
+        result = await asyncio.to_thread(query.execute)
         return result.data if result.data else []
     
     async def update(self, table: str, data: Dict[str, Any], **filters) -> List[Dict[str, Any]]:
         """Update data in a table."""
-        loop = asyncio.get_event_loop()
         query = self.client.table(table).update(data)
+        query = self._apply_filters(query, filters)
         
-        # Apply filters
-        for key, value in filters.items():
-            if value is not None:
-                query = query.eq(key, value)
-        
-        result = await loop.run_in_executor(None, lambda: query.execute())
+        result = await asyncio.to_thread(query.execute)
         return result.data if result.data else []
     
     async def delete(self, table: str, **filters) -> List[Dict[str, Any]]:
         """Delete data from a table."""
-        loop = asyncio.get_event_loop()
         query = self.client.table(table).delete()
+        query = self._apply_filters(query, filters)
         
-        # Apply filters
-        for key, value in filters.items():
-            if value is not None:
-                query = query.eq(key, value)
-        
-        result = await loop.run_in_executor(None, lambda: query.execute())
+        result = await asyncio.to_thread(query.execute)
         return result.data if result.data else []
     
     async def rpc(self, func: str, params: Optional[Dict[str, Any]] = None) -> Any:
         """Call a stored procedure."""
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
-            lambda: self.client.rpc(func, params or {})
-        )
+        result = await asyncio.to_thread(self.client.rpc(func, params or {}).execute)
         return result.data if result.data else None
 
 
@@ -0,0 +1,37 @@
+-- Dashboard Statistics Materialized View
+-- Pre-aggregates deep_research_analysis per brand so the dashboard totals,
+-- sentiment breakdown and top brands read O(#brands) rows instead of
+-- scanning every analysis on each request.
+-- Run after 000_complete_schema_safe.sql (re-run it if that script is re-applied,
+-- since dropping deep_research_analysis cascades to this view).
+
+DROP MATERIALIZED VIEW IF EXISTS dashboard_stats_mv;
+
+CREATE MATERIALIZED VIEW dashboard_stats_mv AS
+SELECT
+    brand_name,
+    AVG(overall_trust_score) AS avg_trust,
+    COUNT(*) AS n,
+    COUNT(*) FILTER (WHERE overall_sentiment_tone = 'positive') AS positive_n,
+    COUNT(*) FILTER (WHERE overall_sentiment_tone = 'neutral') AS neutral_n,
+    COUNT(*) FILTER (WHERE overall_sentiment_tone = 'negative') AS negative_n,
+    COUNT(*) FILTER (WHERE overall_sentiment_tone = 'mixed') AS mixed_n
+FROM deep_research_analysis
+GROUP BY brand_name;
+
+-- REFRESH ... CONCURRENTLY requires a unique index on the view
+CREATE UNIQUE INDEX idx_dashboard_stats_mv_brand_name ON dashboard_stats_mv(brand_name);
+CREATE INDEX idx_dashboard_stats_mv_avg_trust ON dashboard_stats_mv(avg_trust DESC);
+
+-- Called on a schedule by the pg_cron job in 004_dashboard_stats_refresh_schedule.sql
+CREATE OR REPLACE FUNCTION refresh_dashboard_stats()
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY dashboard_stats_mv;
+END;
+$$;
+
+COMMENT ON MATERIALIZED VIEW dashboard_stats_mv IS 'Per-brand aggregates of deep_research_analysis for the dashboard';
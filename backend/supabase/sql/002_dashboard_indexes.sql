@@ -0,0 +1,17 @@
+-- Dashboard Query Indexes
+-- Supports the per-brand dashboard queries, which filter on brand_name and
+-- sort by created_at DESC, with an index scan instead of a seq scan + sort.
+--
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block; run this
+-- file with psql (autocommit) or execute each statement on its own.
+--
+-- Already covered by 000_complete_schema_safe.sql:
+--   idx_deep_research_analysis_created_at (created_at) - scanned backwards for ORDER BY created_at DESC
+--   idx_url_analysis_analysis_id (url_analysis_results.deep_research_analysis_id)
+--   idx_competitor_mentions_analysis_id (competitor_mentions.deep_research_analysis_id)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_deep_research_analysis_brand_created_at
+    ON deep_research_analysis(brand_name, created_at DESC);
+
+-- Check with: EXPLAIN (ANALYZE, BUFFERS)
+--   SELECT id FROM deep_research_analysis WHERE brand_name = 'Tesla' ORDER BY created_at DESC LIMIT 50;
@@ -0,0 +1,15 @@
+-- Detailed Analyses Compression
+-- deep_research_analysis.detailed_analyses is already JSONB (see
+-- 000_complete_schema_safe.sql), so large payloads are TOASTed and compressed
+-- server-side. Switch the column from the default pglz to lz4, which
+-- compresses and decompresses several times faster at a similar ratio.
+--
+-- Requires PostgreSQL 14+ built with lz4 (the Supabase default). Only values
+-- written after this runs use lz4; existing rows keep pglz until rewritten.
+
+ALTER TABLE deep_research_analysis
+    ALTER COLUMN detailed_analyses SET COMPRESSION lz4;
+
+-- Check with:
+--   SELECT pg_column_compression(detailed_analyses), pg_column_size(detailed_analyses)
+--   FROM deep_research_analysis ORDER BY created_at DESC LIMIT 10;
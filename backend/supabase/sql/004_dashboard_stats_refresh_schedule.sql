@@ -0,0 +1,19 @@
+-- Dashboard Statistics Refresh Schedule
+-- Refreshes dashboard_stats_mv (001_dashboard_stats_mv.sql) on a fixed schedule
+-- with pg_cron instead of after every analysis insert, so the cost of
+-- re-aggregating deep_research_analysis is paid once per interval rather than
+-- inside each /api/analytics/analyze request.
+--
+-- The 30 second interval matches the backend's default dashboard_cache_ttl:
+-- the dashboard totals, sentiment breakdown and top brands can lag new
+-- analyses by up to about twice that. Sub-minute schedules need pg_cron 1.5+
+-- (the Supabase default); use '* * * * *' for once a minute on older versions.
+-- Re-running this file updates the existing job, since jobs are keyed by name.
+
+CREATE EXTENSION IF NOT EXISTS pg_cron;
+
+SELECT cron.schedule(
+    'refresh-dashboard-stats',
+    '30 seconds',
+    'SELECT refresh_dashboard_stats()'
+);
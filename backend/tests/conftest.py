@@ -1,20 +1,79 @@
 """Pytest configuration and fixtures."""
 
+import copy
+from types import MappingProxyType
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
+import pytest_asyncio
 
+from app import main
+from app.core.config import Settings
+from app.services.perplexity_client import PerplexityClient, get_perplexity_client
+from app.supabase.client import db
 
-@pytest.fixture
-def client():
-    """Create a test client for the FastAPI app."""
-    return TestClient(app)
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def app():
+    """The FastAPI app with its lifespan started once for the whole session."""
+    async with main.app.router.lifespan_context(main.app):
+        yield main.app
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def aclient(app):
+    """Create an async client that calls the FastAPI app in-process, shared by the session."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        yield async_client
+
+
+def _reset_search_mock(search_mock: AsyncMock):
+    """Forget recorded calls and go back to returning an empty search result."""
+    search_mock.reset_mock(side_effect=True)
+    search_mock.return_value = {"total_sources_analyzed": 0, "crawled_content": []}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _mock_external():
+    """Replace the app's Perplexity client and database writes for the whole session."""
+    search_mock = AsyncMock(name="search_and_analyze")
+    _reset_search_mock(search_mock)
+    perplexity_stub = MagicMock(spec=PerplexityClient)
+    perplexity_stub.search_and_analyze = search_mock
+    main.app.dependency_overrides[get_perplexity_client] = lambda: perplexity_stub
+
+    patcher = pytest.MonkeyPatch()
+    patcher.setattr(db, "insert", AsyncMock(name="db.insert", return_value={}))
+    # _store_analysis_results deletes the analysis row if its URL rows fail
+    patcher.setattr(db, "delete", AsyncMock(name="db.delete", return_value=[]))
+    yield search_mock
+    patcher.undo()
+    main.app.dependency_overrides.pop(get_perplexity_client, None)
 
 
 @pytest.fixture
-def mock_perplexity_response():
-    """Mock Perplexity API response."""
-    return {
+def perplexity_mock(_mock_external):
+    """The session's Perplexity search mock, reset around each test."""
+    _reset_search_mock(_mock_external)
+    yield _mock_external
+    _reset_search_mock(_mock_external)
+
+
+@pytest.fixture(scope="session")
+def default_settings():
+    """Settings built once from the minimal required fields."""
+    return Settings(
+        supabase_url="https://test.supabase.co",
+        supabase_service_key="test_key"
+    )
+
+
+@pytest.fixture(scope="session")
+def _mock_perplexity_frozen():
+    """Mock Perplexity API response, built once and read-only at the top level."""
+    return MappingProxyType({
         "total_sources_analyzed": 25,
         "content": "Test analysis content",
         "total_tokens_used": 1000,
@@ -35,4 +94,16 @@ def mock_perplexity_response():
                 "sentiment": "neutral"
             }
         ]
-    }
+    })
+
+
+@pytest.fixture
+def mock_perplexity_response(_mock_perplexity_frozen):
+    """Mock Perplexity API response, as a private copy a test may modify."""
+    return copy.deepcopy(dict(_mock_perplexity_frozen))
+
+
+@pytest.fixture
+def mock_perplexity_response_ro(_mock_perplexity_frozen):
+    """Mock Perplexity API response shared by every test; do not modify."""
+    return _mock_perplexity_frozen
@@ -0,0 +1,85 @@
+"""Tests for in-process caching helpers."""
+
+import pytest
+
+from app.core.cache import async_ttl_cache
+
+
+@pytest.mark.asyncio
+async def test_async_ttl_cache_reuses_results():
+    """Test that repeated calls with the same arguments hit the cache."""
+    calls = []
+
+    @async_ttl_cache(maxsize=8, ttl=60)
+    async def fetch(value):
+        calls.append(value)
+        return value * 2
+
+    assert await fetch(2) == 4
+    assert await fetch(2) == 4
+    assert await fetch(3) == 6
+    assert calls == [2, 3]
+
+
+@pytest.mark.asyncio
+async def test_async_ttl_cache_clear_and_expiry():
+    """Test explicit invalidation and zero-TTL entries."""
+    calls = []
+
+    @async_ttl_cache(maxsize=8, ttl=60)
+    async def cached():
+        calls.append(1)
+        return len(calls)
+
+    @async_ttl_cache(maxsize=8, ttl=0)
+    async def uncached():
+        calls.append(1)
+        return len(calls)
+
+    assert await cached() == 1
+    cached.cache_clear()
+    assert await cached() == 2
+
+    await uncached()
+    await uncached()
+    assert len(calls) == 4
+
+
+@pytest.mark.asyncio
+async def test_async_ttl_cache_evicts_least_recently_used():
+    """Test that the cache holds at most maxsize entries."""
+    calls = []
+
+    @async_ttl_cache(maxsize=2, ttl=60)
+    async def fetch(value):
+        calls.append(value)
+        return value
+
+    await fetch(1)
+    await fetch(2)
+    await fetch(1)
+    await fetch(3)  # evicts 2
+    await fetch(1)
+    await fetch(2)
+    assert calls == [1, 2, 3, 2]
+
+
+@pytest.mark.asyncio
+async def test_async_ttl_cache_shares_inflight_calls():
+    """Test that concurrent identical calls run once and failures are not cached."""
+    import asyncio
+
+    calls = []
+
+    @async_ttl_cache(maxsize=8, ttl=60)
+    async def fetch(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return value
+
+    results = await asyncio.gather(fetch(1), fetch(1), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert await asyncio.gather(fetch(1), fetch(1)) == [1, 1]
+    assert calls == [1, 1]
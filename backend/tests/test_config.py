@@ -1,14 +1,13 @@
 """Tests for configuration settings."""
 
 import pytest
-import os
 from pydantic import ValidationError
 
+from app.core.config import Settings
+
 
 def test_settings_requires_supabase():
     """Test that settings require Supabase configuration."""
-    from app.core.config import Settings
-
     # Should raise validation error if required fields are missing
     with pytest.raises(ValidationError):
         Settings(
@@ -17,18 +16,20 @@ def test_settings_requires_supabase():
         )
 
 
-def test_settings_defaults():
+def test_settings_defaults(default_settings):
     """Test default configuration values."""
-    from app.core.config import Settings
-
-    # Create settings with minimal required fields
-    settings = Settings(
-        supabase_url="https://test.supabase.co",
-        supabase_service_key="test_key"
-    )
+    settings = default_settings
 
     assert settings.app_name == "Arrakis MVP"
     assert settings.debug is False
     assert "http://localhost:3000" in settings.cors_origins
     assert settings.openai_model == "gpt-4o"
     assert settings.pplx_target_sites == 50
+
+
+def test_settings_read_worker_count(monkeypatch):
+    """Test that the worker count sharing the Perplexity limits comes from WEB_CONCURRENCY."""
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    settings = Settings(supabase_url="https://test.supabase.co", supabase_service_key="test_key")
+
+    assert settings.web_concurrency == 4
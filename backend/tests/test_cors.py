@@ -3,12 +3,23 @@
 import pytest
 
 
-def test_cors_headers(client):
+@pytest.mark.asyncio(loop_scope="session")
+async def test_cors_headers(aclient):
     """Test that CORS headers are properly set."""
-    response = client.options(
+    response = await aclient.options(
         "/api/healthz",
         headers={"Origin": "http://localhost:3000"}
     )
 
     # Should allow CORS from localhost:3000
     assert response.status_code in [200, 204]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_cors_allowed_origin(aclient):
+    """Test that a configured origin is echoed back and others are not."""
+    response = await aclient.get("/api/healthz", headers={"Origin": "http://localhost:3000"})
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+
+    response = await aclient.get("/api/healthz", headers={"Origin": "https://evil.example"})
+    assert "access-control-allow-origin" not in response.headers
@@ -0,0 +1,107 @@
+"""Tests for dashboard endpoints."""
+
+from datetime import datetime
+
+import pytest
+
+from app.api import dashboard
+
+
+@pytest.fixture
+def brand_queries(monkeypatch):
+    """Replace the brand dashboard queries with in-memory results."""
+    rows = [
+        {"id": str(i), "created_at": f"2025-01-{20 - i:02d}T00:00:00+00:00"}
+        for i in range(3)
+    ]
+
+    async def analyses(brand_name, limit=50, before=None):
+        older = [
+            r
+            for r in rows
+            if before is None or datetime.fromisoformat(r["created_at"]) < before
+        ]
+        return older[:limit]
+
+    async def url_details(analysis_ids):
+        # Three URL rows per analysis
+        return [
+            {"url": f"https://site.com/{i}/{n}"} for i in analysis_ids for n in range(3)
+        ]
+
+    async def empty(*args, **kwargs):
+        return []
+
+    monkeypatch.setattr(dashboard, "_get_brand_analyses", analyses)
+    monkeypatch.setattr(dashboard, "_get_brand_sentiment_trend", empty)
+    monkeypatch.setattr(dashboard, "_get_brand_competitors", empty)
+    monkeypatch.setattr(dashboard, "_get_brand_url_details", url_details)
+    return rows
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_brand_dashboard_pagination(aclient, brand_queries):
+    """Test that a full page returns the cursor of its last row."""
+    response = await aclient.get("/api/dashboard/brand/Tesla", params={"limit": 2})
+    assert response.status_code == 200
+    data = response.json()
+    assert [a["id"] for a in data["analyses"]] == ["0", "1"]
+    assert data["next_cursor"] == brand_queries[1]["created_at"]
+
+    response = await aclient.get("/api/dashboard/brand/Tesla", params={"limit": 5})
+    assert response.json()["next_cursor"] is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_brand_dashboard_pages_through_url_details(aclient, brand_queries):
+    """Test that URL rows beyond the page limit are reached on later pages."""
+    urls = []
+    params = {"limit": 2}
+    while True:
+        data = (await aclient.get("/api/dashboard/brand/Tesla", params=params)).json()
+        urls += [u["url"] for u in data["url_details"]]
+        if data["next_cursor"] is None:
+            break
+        params["cursor"] = data["next_cursor"]
+
+    assert len(urls) == 9
+    assert len(set(urls)) == 9
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_brand_dashboard_invalid_cursor(aclient, brand_queries):
+    """Test that a malformed cursor is rejected."""
+    response = await aclient.get(
+        "/api/dashboard/brand/Tesla", params={"cursor": "yesterday"}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_failed_query_falls_back_without_caching(monkeypatch):
+    """Test that a failing query returns the fallback and is retried on the next call."""
+    results = [ConnectionError("database unavailable"), [{"count": 3}]]
+
+    async def execute_raw_sql(query, params=None):
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(dashboard.db, "execute_raw_sql", execute_raw_sql)
+    dashboard.invalidate_dashboard_cache()
+    try:
+        assert (
+            await dashboard._with_fallback(
+                dashboard._get_total_analyses(), 0, "total analyses"
+            )
+            == 0
+        )
+        assert (
+            await dashboard._with_fallback(
+                dashboard._get_total_analyses(), 0, "total analyses"
+            )
+            == 3
+        )
+    finally:
+        dashboard.invalidate_dashboard_cache()
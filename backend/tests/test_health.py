@@ -1,21 +1,85 @@
 """Tests for health check endpoints."""
 
+import logging
+
+import orjson
 import pytest
 
+from app import main
+from app.core.config import settings
+from app.core.logging import Metrics, _CachedTimeFormatter
+
+
+def _json(response):
+    """Decode a response body with orjson, the encoder the app responds with."""
+    return orjson.loads(response.content)
+
 
-def test_health_check(client):
+@pytest.mark.asyncio(loop_scope="session")
+async def test_health_check(aclient):
     """Test the health check endpoint."""
-    response = client.get("/api/healthz")
+    response = await aclient.get("/api/healthz")
     assert response.status_code == 200
-    data = response.json()
+    data = _json(response)
     assert data["status"] == "healthy"
+    assert data["timestamp"].endswith("Z")
+    assert data["timestamp"] != "2024-01-01T00:00:00Z"
 
 
-def test_root_endpoint(client):
+@pytest.mark.asyncio(loop_scope="session")
+async def test_root_endpoint(aclient):
     """Test the root endpoint."""
-    response = client.get("/")
+    response = await aclient.get("/")
     assert response.status_code == 200
-    data = response.json()
+    data = _json(response)
     assert data["message"] == "Welcome to Arrakis MVP"
     assert data["version"] == "1.0.0"
     assert "/docs" in data["docs"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_readiness_endpoint(aclient):
+    """Test the readiness endpoint reports each dependency."""
+    response = await aclient.get("/api/health/readiness")
+    assert response.status_code == 200
+    data = _json(response)
+    assert data["status"] in ["ready", "degraded"]
+    assert data["database"] in ["ok", "unavailable", "not_configured"]
+    assert isinstance(data["perplexity_key_present"], bool)
+
+
+def test_metrics_increment():
+    """Test that known metrics count up and unknown ones are ignored."""
+    m = Metrics()
+    m.increment("runs_completed")
+    m.increment("runs_completed")
+    m.increment("not_a_metric")
+
+    data = m.get_metrics()
+    assert data["runs_completed"] == 2
+    assert data["runs_enqueued"] == 0
+    assert "not_a_metric" not in data
+
+
+def test_log_formatter_matches_default_asctime():
+    """Test that the cached log timestamp matches the stock formatter's."""
+    fmt = "%(asctime)s %(message)s"
+    cached = _CachedTimeFormatter(fmt)
+    stock = logging.Formatter(fmt)
+    for created in (1700000000.123, 1700000000.987, 1700000001.5):
+        record = logging.makeLogRecord(
+            {"msg": "hi", "created": created, "msecs": (created % 1) * 1000}
+        )
+        assert cached.format(record) == stock.format(record)
+
+
+@pytest.mark.asyncio
+async def test_startup_warns_without_database_url(caplog, monkeypatch):
+    """Test that a missing DATABASE_URL is reported once at startup."""
+    monkeypatch.setattr(settings, "database_url", None)
+
+    with caplog.at_level(logging.WARNING, logger="app.main"):
+        async with main.lifespan(main.app):
+            pass
+
+    assert "DATABASE_URL is not configured" in caplog.text
@@ -0,0 +1,264 @@
+"""Tests for the Perplexity search orchestration."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from openai.types.chat import ChatCompletionChunk
+
+from app.services import perplexity_client as perplexity_module
+from app.services.perplexity_client import (
+    PerplexityClient,
+    TokenBucket,
+    close_perplexity_client,
+    get_perplexity_client,
+)
+
+
+def chunk(content, finish_reason, citations, usage):
+    """Build one streamed completion chunk as Perplexity sends it."""
+    return ChatCompletionChunk.model_validate(
+        {
+            "id": "test",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "sonar",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": finish_reason,
+                    "delta": {"content": content},
+                }
+            ],
+            "usage": usage,
+            "citations": citations,
+        }
+    )
+
+
+class FakeStream:
+    """Async chunk stream usable like the client's AsyncStream."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def __aiter__(self):
+        for item in self.chunks:
+            yield item
+
+
+@pytest.fixture(autouse=True)
+def clear_search_cache():
+    """Start and end every test with an empty search cache."""
+    PerplexityClient._search.cache_clear()
+    yield
+    PerplexityClient._search.cache_clear()
+
+
+@pytest.fixture
+def perplexity_client(monkeypatch):
+    """A PerplexityClient whose API calls return two citations per query, two at a time."""
+    client = PerplexityClient.__new__(PerplexityClient)
+    calls = []
+
+    async def fake_create(**kwargs):
+        calls.append(kwargs["messages"][0]["content"])
+        citations = [f"https://www.site{len(calls)}-{n}.com/" for n in range(2)]
+        await asyncio.sleep(0)
+        return FakeStream(
+            [
+                chunk("great ", None, citations, None),
+                chunk(
+                    "growth",
+                    "stop",
+                    citations,
+                    {"prompt_tokens": 4, "completion_tokens": 6, "total_tokens": 10},
+                ),
+                chunk("never read", None, citations, None),
+            ]
+        )
+
+    client.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=fake_create))
+    )
+    monkeypatch.setattr(perplexity_module, "_CONCURRENCY", asyncio.Semaphore(2))
+    monkeypatch.setattr(
+        perplexity_module, "_RATE_LIMITER", TokenBucket(capacity=100, rate=100)
+    )
+    client.calls = calls
+    return client
+
+
+@pytest.mark.asyncio
+async def test_search_stops_at_target(perplexity_client):
+    """Test that queries run concurrently and stop once the target is reached."""
+    result = await perplexity_client.search_and_analyze("Tesla", target_websites=4)
+
+    assert result["total_sources_analyzed"] == 4
+    assert len(perplexity_client.calls) < 20
+    assert [c["rank"] for c in result["crawled_content"]] == [1, 2, 3, 4]
+    assert result["citations"] == [c["url"] for c in result["crawled_content"]]
+    assert result["usage"]["total_tokens"] == 20
+
+
+@pytest.mark.asyncio
+async def test_get_perplexity_client_is_shared():
+    """Test that the accessor hands out one client until it is closed."""
+    client = await get_perplexity_client()
+    assert await get_perplexity_client() is client
+
+    await close_perplexity_client()
+    assert await get_perplexity_client() is not client
+    await close_perplexity_client()
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_throttles_after_burst(monkeypatch):
+    """Test that the bucket allows a burst and then waits for refills."""
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    bucket = TokenBucket(capacity=2, rate=10)
+
+    for _ in range(4):
+        await bucket.acquire()
+
+    assert len(sleeps) == 2
+    assert sleeps[0] == pytest.approx(0.1, abs=0.01)
+    assert sleeps[1] == pytest.approx(0.2, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_refunds_cancelled_wait():
+    """Test that a caller cancelled while throttled gives its token back."""
+    bucket = TokenBucket(capacity=1, rate=1)
+    await bucket.acquire()
+
+    waiter = asyncio.create_task(bucket.acquire())
+    await asyncio.sleep(0)
+    assert bucket.tokens < 0
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert bucket.tokens == pytest.approx(0, abs=0.01)
+
+
+def test_extract_insights_matches_whole_words():
+    """Test that sentiment keywords only count as whole words."""
+    client = PerplexityClient.__new__(PerplexityClient)
+
+    assert (
+        client._extract_insights_from_content("Great growth, good results")[
+            "sentiment"
+        ]["label"]
+        == "positive"
+    )
+    assert (
+        client._extract_insights_from_content("A bad problem. Bad.")["sentiment"][
+            "label"
+        ]
+        == "negative"
+    )
+    assert (
+        client._extract_insights_from_content("Goodness, badminton")["sentiment"][
+            "label"
+        ]
+        == "neutral"
+    )
+
+
+def test_format_citations_extracts_domain():
+    """Test that citation sources are the URL host without www."""
+    client = PerplexityClient.__new__(PerplexityClient)
+
+    content = client._format_citations_as_content(
+        ["https://www.example.com/a?b=1", "http://news.site.org", "not a url"]
+    )
+    assert [c["source"] for c in content] == ["example.com", "news.site.org", "unknown"]
+
+
+def test_generate_queries_adds_company_queries():
+    """Test that known company names add the company-specific queries."""
+    client = PerplexityClient.__new__(PerplexityClient)
+
+    generic = client._generate_diverse_search_queries("electric cars")
+    company = client._generate_diverse_search_queries("Is Tesla's brand growing?")
+    assert generic[0] == "electric cars"
+    assert len(generic) == 15
+    assert len(company) == 20
+    assert (
+        company[-1]
+        == "Is Tesla's brand growing? sustainability and corporate responsibility"
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_results_are_cached(perplexity_client):
+    """Test that concurrent and repeated identical searches share one run."""
+    first, second = await asyncio.gather(
+        perplexity_client.search_and_analyze("Nike", target_websites=4),
+        perplexity_client.search_and_analyze("Nike", target_websites=4),
+    )
+    calls = len(perplexity_client.calls)
+
+    third = await perplexity_client.search_and_analyze("Nike", target_websites=4)
+    assert first is second is third
+    assert len(perplexity_client.calls) == calls
+
+
+@pytest.mark.asyncio
+async def test_search_cache_is_shared_between_clients(perplexity_client):
+    """Test that the cache is keyed on the search inputs, not the client instance."""
+    first = await perplexity_client.search_and_analyze("Nike", target_websites=4)
+
+    other = PerplexityClient.__new__(PerplexityClient)
+    other.client = perplexity_client.client
+    assert await other.search_and_analyze("Nike", target_websites=4) is first
+
+
+def test_aggregate_results_reranks_with_floor():
+    """Test that aggregated relevance decreases by rank down to the floor."""
+    client = PerplexityClient.__new__(PerplexityClient)
+    urls = [f"https://site{i}.com/" for i in range(60)]
+    result = client._aggregate_results(
+        [{"crawled_content": client._format_citations_as_content(urls)}], 60
+    )
+
+    scores = [c["relevance_score"] for c in result["crawled_content"]]
+    assert scores == [max(0.1, 1.0 - (i * 0.02)) for i in range(60)]
+
+
+@pytest.mark.asyncio
+async def test_collect_stream_stops_at_finish():
+    """Test that a streamed completion is assembled up to its finish reason."""
+    citations = ["https://example.com/"]
+    stream = FakeStream(
+        [
+            chunk("Tesla ", None, [], None),
+            chunk(
+                "grows",
+                "stop",
+                citations,
+                {"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3},
+            ),
+            chunk(" ignored", None, citations, None),
+        ]
+    )
+
+    response = await PerplexityClient._collect_stream(stream)
+    parsed = PerplexityClient.__new__(PerplexityClient)._parse_perplexity_response(
+        response
+    )
+    assert parsed["content"] == "Tesla grows"
+    assert parsed["citations"] == citations
+    assert parsed["usage"]["total_tokens"] == 3
+    assert await PerplexityClient._collect_stream(FakeStream([])) is None
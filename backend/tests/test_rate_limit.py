@@ -0,0 +1,77 @@
+"""Tests for rate limiting."""
+
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core import rate_limit
+from app.core.rate_limit import RateLimiter
+
+
+def test_rate_limiter_blocks_after_limit():
+    """Test that a client is blocked once its window is used up."""
+    limiter = RateLimiter(requests_per_window=3, window_seconds=60)
+
+    assert [limiter.is_allowed("1.2.3.4") for _ in range(3)] == [
+        (True, 2),
+        (True, 1),
+        (True, 0),
+    ]
+    assert limiter.is_allowed("1.2.3.4") == (False, 0)
+    # Other clients have their own window
+    assert limiter.is_allowed("5.6.7.8") == (True, 2)
+
+
+def test_rate_limiter_clear_old_entries():
+    """Test that clients whose bucket has refilled are dropped."""
+    limiter = RateLimiter(requests_per_window=3, window_seconds=0.1)
+
+    limiter.is_allowed("1.2.3.4")
+    limiter.clear_old_entries()
+    assert "1.2.3.4" in limiter.requests
+
+    time.sleep(0.15)
+    limiter.clear_old_entries()
+    assert "1.2.3.4" not in limiter.requests
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_rate_limit_applies_to_metered_routes_only(aclient, monkeypatch):
+    """Test that metered routers are limited and health checks are not."""
+    monkeypatch.setattr(
+        rate_limit,
+        "rate_limiter",
+        RateLimiter(requests_per_window=1, window_seconds=60),
+    )
+
+    assert (await aclient.post("/api/analytics/analyze", json={})).status_code == 422
+    response = await aclient.post("/api/analytics/analyze", json={})
+    assert response.status_code == 429
+    assert response.headers["X-RateLimit-Remaining"] == "0"
+
+    response = await aclient.get("/api/healthz")
+    assert response.status_code == 200
+    assert "X-RateLimit-Limit" not in response.headers
+
+
+def test_rate_limiter_evicts_least_recent_client():
+    """Test that the number of tracked clients is capped."""
+    limiter = RateLimiter(requests_per_window=3, window_seconds=60, max_clients=2)
+
+    limiter.is_allowed("a")
+    limiter.is_allowed("b")
+    limiter.is_allowed("a")
+    limiter.is_allowed("c")  # evicts b
+    assert list(limiter.requests) == ["a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_close_rate_limiter_closes_redis(monkeypatch):
+    """Test that shutdown closes the shared Redis limiter's client."""
+    limiter = rate_limit.RedisRateLimiter("redis://localhost:6379/0")
+    limiter.redis.aclose = AsyncMock()
+    monkeypatch.setattr(rate_limit, "redis_rate_limiter", limiter)
+
+    await rate_limit.close_rate_limiter()
+    limiter.redis.aclose.assert_awaited_once()
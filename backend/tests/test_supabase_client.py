@@ -0,0 +1,16 @@
+"""Tests for the Supabase client wrapper."""
+
+from app.supabase.client import SupabaseClient, db
+
+
+def test_apply_filters_skips_none_values():
+    """Test that only non-None filters become equality conditions."""
+    query = SupabaseClient._apply_filters(
+        db.client.table("brands").select("*"), {"name": "Tesla", "id": None}
+    )
+    assert dict(query.params) == {"select": "*", "name": "eq.Tesla"}
+
+    query = SupabaseClient._apply_filters(
+        db.client.table("brands").select("*"), {"id": None}
+    )
+    assert dict(query.params) == {"select": "*"}
@@ -0,0 +1,51 @@
+"""Tests for input validation and sanitization."""
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import validation
+from app.core.validation import InputValidator
+
+
+def test_sanitize_prompt():
+    """Test that prompts are trimmed and stripped of markup characters."""
+    assert (
+        InputValidator.sanitize_prompt("  How is <Tesla> doing?  ")
+        == "How is Tesla doing?"
+    )
+    assert InputValidator.sanitize_prompt(" " * 100 + "x" * 2000) == "x" * 2000
+
+    for prompt in [
+        "",
+        "   ",
+        "x" * 2001,
+        " " * 300 + "x" * 2000,
+        "SELECT name FROM brands",
+        "Tesla -- Nike",
+        "brand' OR 1=1",
+    ]:
+        with pytest.raises(HTTPException) as exc:
+            InputValidator.sanitize_prompt(prompt)
+        assert exc.value.status_code == 400
+
+
+def test_sanitize_brand_name():
+    """Test that brand names keep only letters, digits, spaces, hyphens and apostrophes."""
+    assert InputValidator.sanitize_brand_name("Coca-Cola") == "Coca-Cola"
+    assert InputValidator.sanitize_brand_name("  McDonald's  ") == "McDonald's"
+    assert InputValidator.sanitize_brand_name("AT&T   Inc.") == "ATT Inc"
+    assert InputValidator.sanitize_brand_name("Coca\tCola  Co") == "Coca Cola Co"
+
+    for brand_name in ["", "!!!", "x" * 201]:
+        with pytest.raises(HTTPException):
+            InputValidator.sanitize_brand_name(brand_name)
+
+
+def test_validate_integer():
+    """Test integer coercion and range checks via the module-level function."""
+    assert validation.validate_integer("7", min_value=1, max_value=10) == 7
+    assert InputValidator.validate_integer is validation.validate_integer
+
+    for value in ["seven", None, 0, 11]:
+        with pytest.raises(HTTPException):
+            validation.validate_integer(value, min_value=1, max_value=10)